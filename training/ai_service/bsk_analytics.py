@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
-from collections import Counter
 from typing import Optional, Tuple
 
+from recommender_kernels import count_pairs, factorize_codes, top_services
+
 
 def find_underperforming_bsks(
     bsks_df,
@@ -30,10 +31,12 @@ def find_underperforming_bsks(
     Returns:
         DataFrame with BSK info, total_services, recommended_services, and DEO details
     """
-    # --- Ensure provisions_df has district_id for district-level logic ---
-    provisions_df = provisions_df.merge(
-        bsks_df[["bsk_id", "district_id"]], on="bsk_id", how="left"
-    )
+    # --- District of each BSK, for district-level logic on provisions ---
+    # A lookup instead of merging district_id into provisions_df, which would
+    # copy the whole provisions table
+    bsk_districts = bsks_df.drop_duplicates("bsk_id").set_index("bsk_id")[
+        "district_id"
+    ]
     # 1. Filter provisions by period if specified
     if period_start or period_end:
         provisions_df = provisions_df.copy()
@@ -87,57 +90,71 @@ def find_underperforming_bsks(
     clust_thresholds = clust_avgs - clust_buffers
 
     # 6. Flag underperformers and attach reason
-    def is_under(row):
-        dist_thr = dist_thresholds.get(row["district_id"], state_threshold)
-        clust_thr = clust_thresholds.get(row["cluster_id"], state_threshold)
-        reasons = []
-        if row["total_services"] < state_threshold:
-            reasons.append(
-                f'Below state threshold ({row["total_services"]:.1f} < {state_threshold:.1f})'
-            )
-        if row["total_services"] < dist_thr:
-            reasons.append(
-                f'Below district threshold ({row["total_services"]:.1f} < {dist_thr:.1f})'
-            )
-        if row["total_services"] < clust_thr:
-            reasons.append(
-                f'Below cluster threshold ({row["total_services"]:.1f} < {clust_thr:.1f})'
-            )
-        under = (
-            row["total_services"] < state_threshold
-            and row["total_services"] < dist_thr
-            and row["total_services"] < clust_thr
-        )
-        return under, ", ".join(reasons)
-
-    merged[["underperforming", "reason"]] = merged.apply(
-        lambda row: pd.Series(is_under(row)), axis=1
-    )
+    # Thresholds are compared column-wise; only the reason text is built per row
+    total = merged["total_services"]
+    dist_thr = merged["district_id"].map(dist_thresholds).fillna(state_threshold)
+    clust_thr = merged["cluster_id"].map(clust_thresholds).fillna(state_threshold)
+    below_state = total < state_threshold
+    below_dist = total < dist_thr
+    below_clust = total < clust_thr
+    merged["underperforming"] = below_state & below_dist & below_clust
+
+    reasons = []
+    for value, d_thr, c_thr, s_flag, d_flag, c_flag in zip(
+        total, dist_thr, clust_thr, below_state, below_dist, below_clust
+    ):
+        parts = []
+        if s_flag:
+            parts.append(f"Below state threshold ({value:.1f} < {state_threshold:.1f})")
+        if d_flag:
+            parts.append(f"Below district threshold ({value:.1f} < {d_thr:.1f})")
+        if c_flag:
+            parts.append(f"Below cluster threshold ({value:.1f} < {c_thr:.1f})")
+        reasons.append(", ".join(parts))
+    merged["reason"] = reasons
     under_bsks = merged[merged["underperforming"]].copy()
 
     # 7. For each underperforming BSK, recommend Top 10 services in its district not delivered by this BSK
-    recommendations = []
-    for idx, row in under_bsks.iterrows():
-        bsk_id = row["bsk_id"]
-        district_id = row["district_id"]
-        cluster_id = row["cluster_id"]
-        # Services delivered by this BSK
-        bsk_services = set(
-            provisions_df[provisions_df["bsk_id"] == bsk_id]["service_id"]
+    # One dict lookup per service instead of scanning services_df each time
+    service_names = dict(
+        zip(
+            services_df["service_id"].tolist(),
+            services_df["service_name"].tolist(),
         )
+    )
+    # Count (district, service) and (bsk, service) pairs once instead of
+    # filtering provisions_df for every underperforming BSK
+    service_codes, service_ids = factorize_codes(provisions_df["service_id"])
+    district_codes, district_ids = factorize_codes(
+        provisions_df["bsk_id"].map(bsk_districts)
+    )
+    bsk_codes, bsk_ids = factorize_codes(provisions_df["bsk_id"])
+    district_counts, district_first_seen = count_pairs(
+        district_codes, service_codes, len(district_ids), len(service_ids)
+    )
+    bsk_counts, _ = count_pairs(
+        bsk_codes, service_codes, len(bsk_ids), len(service_ids)
+    )
+    district_index = {d: i for i, d in enumerate(district_ids)}
+    bsk_index = {b: i for i, b in enumerate(bsk_ids)}
+
+    recommendations = []
+    for bsk_id, district_id in zip(under_bsks["bsk_id"], under_bsks["district_id"]):
+        district_code = district_index.get(district_id)
+        if district_code is None:
+            recommendations.append([])
+            continue
         # Top services in district
-        district_services = provisions_df[provisions_df["district_id"] == district_id][
-            "service_id"
-        ]
-        top_services = [sid for sid, _ in Counter(district_services).most_common(10)]
-        # Recommend those not already delivered
-        recommended = [sid for sid in top_services if sid not in bsk_services]
+        top_codes = top_services(
+            district_counts, district_first_seen, district_code, 10
+        )
+        # Recommend those not already delivered by this BSK
+        bsk_code = bsk_index.get(bsk_id)
+        if bsk_code is not None:
+            top_codes = top_codes[bsk_counts[bsk_code, top_codes] == 0]
+        recommended = [service_ids[code] for code in top_codes]
         # Get service names
-        rec_names = [
-            services_df.loc[services_df["service_id"] == sid, "service_name"].values[0]
-            for sid in recommended
-            if sid in services_df["service_id"].values
-        ]
+        rec_names = [service_names[sid] for sid in recommended if sid in service_names]
         recommendations.append(rec_names)
     under_bsks["recommended_services"] = recommendations
 
@@ -4,334 +4,796 @@ This module provides functions to fetch data from the database tables.
 """
 
 import pandas as pd
+import functools
+import importlib.util
+import logging
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import Boolean, func, literal_column, select, true
 from sqlalchemy.orm import Session
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, NamedTuple, Tuple, Union
 import sys
 import os
 
-# Add backend to path for imports
-sys.path.append(
-    os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), "backend"))
+logger = logging.getLogger(__name__)
+
+
+class DatabaseModels(NamedTuple):
+    """Backend session factory and the ORM models this module queries."""
+
+    SessionLocal: type
+    ServiceMaster: type
+    BSKMaster: type
+    DEOMaster: type
+    Provision: type
+
+
+@functools.cache
+def _load_models() -> Optional[DatabaseModels]:
+    """
+    Import the backend database models on first use.
+
+    The backend is importable as ``app`` (with ``backend/`` on sys.path) or as
+    ``backend.app`` from the project root; whichever works first is cached, so
+    importing this module stays cheap and the lookup runs once per process.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (os.path.join(project_root, "backend"), project_root):
+        if path not in sys.path:
+            sys.path.append(path)
+
+    error = None
+    for package in ("app.models", "backend.app.models"):
+        try:
+            database = importlib.import_module(f"{package}.database")
+            models = importlib.import_module(f"{package}.models")
+        except ImportError as e:
+            error = e
+            continue
+
+        logger.info(f"Database models imported from {package}")
+        return DatabaseModels(
+            SessionLocal=database.SessionLocal,
+            ServiceMaster=models.ServiceMaster,
+            BSKMaster=models.BSKMaster,
+            DEOMaster=models.DEOMaster,
+            Provision=models.Provision,
+        )
+
+    logger.warning(
+        f"Could not import database models. Error: {error}. Make sure you're "
+        "running from the project root and backend dependencies are installed."
+    )
+    return None
+
+
+# Number of rows SQLAlchemy buffers per fetch when streaming query results
+FETCH_BATCH_SIZE = 5000
+
+# Columns projected by each fetch_* function. Text columns are coalesced to
+# empty strings in SQL so callers never see NULLs there.
+SERVICE_COLUMNS = (
+    "service_id",
+    "service_name",
+    "service_type",
+    "service_desc",
+    "common_name",
+    "department_name",
+    "department_id",
+    "how_to_apply",
+    "eligibility_criteria",
+    "required_doc",
+    "is_active",
+    "is_paid_service",
+)
+SERVICE_TEXT_COLUMNS = (
+    "service_name",
+    "service_type",
+    "service_desc",
+    "common_name",
+    "department_name",
+    "how_to_apply",
+    "eligibility_criteria",
+    "required_doc",
+)
+
+BSK_COLUMNS = (
+    "bsk_id",
+    "bsk_name",
+    "bsk_code",
+    "district_name",
+    "district_id",
+    "block_municipalty_name",
+    "bsk_lat",
+    "bsk_long",
+    "bsk_address",
+    "is_active",
+    "no_of_deos",
 )
-sys.path.append(
-    os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+BSK_TEXT_COLUMNS = (
+    "bsk_name",
+    "bsk_code",
+    "district_name",
+    "block_municipalty_name",
+    "bsk_address",
 )
 
-try:
-    from app.models.database import SessionLocal
-    from app.models.models import ServiceMaster, BSKMaster, DEOMaster, Provision
+DEO_COLUMNS = (
+    "agent_id",
+    "user_name",
+    "agent_code",
+    "agent_email",
+    "agent_phone",
+    "bsk_id",
+    "bsk_name",
+    "date_of_engagement",
+    "bsk_post",
+    "is_active",
+)
+DEO_TEXT_COLUMNS = (
+    "user_name",
+    "agent_code",
+    "agent_email",
+    "agent_phone",
+    "bsk_name",
+    "bsk_post",
+)
 
-    print("✅ Database models imported successfully")
-except ImportError as e:
-    try:
-        # Try alternative import
-        from backend.app.models.database import SessionLocal
-        from backend.app.models.models import (
-            ServiceMaster,
-            BSKMaster,
-            DEOMaster,
-            Provision,
+PROVISION_COLUMNS = (
+    "bsk_id",
+    "bsk_name",
+    "customer_id",
+    "customer_name",
+    "customer_phone",
+    "service_id",
+    "service_name",
+    "prov_date",
+    "docket_no",
+)
+PROVISION_TEXT_COLUMNS = (
+    "bsk_name",
+    "customer_name",
+    "customer_phone",
+    "service_name",
+    "docket_no",
+)
+
+
+# Remaining text columns use Arrow-backed strings, which keep the text in one
+# contiguous buffer instead of a Python object per cell. Without pyarrow they
+# stay plain object columns.
+TEXT_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else None
+
+# Narrow dtypes for id/flag columns (nullable where the column allows NULL)
+# and categoricals for low-cardinality text, applied when building frames.
+SERVICE_DTYPES = {
+    **dict.fromkeys(SERVICE_TEXT_COLUMNS, TEXT_DTYPE),
+    "service_id": "int32",
+    "service_type": "category",
+    "department_name": "category",
+    "department_id": "Int32",
+    "is_active": "Int8",
+    "is_paid_service": "boolean",
+}
+BSK_DTYPES = {
+    **dict.fromkeys(BSK_TEXT_COLUMNS, TEXT_DTYPE),
+    "bsk_id": "int32",
+    "district_name": "category",
+    "district_id": "Int32",
+    "is_active": "boolean",
+    "no_of_deos": "Int16",
+}
+DEO_DTYPES = {
+    **dict.fromkeys(DEO_TEXT_COLUMNS, TEXT_DTYPE),
+    "agent_id": "int32",
+    "bsk_id": "Int32",
+    "bsk_post": "category",
+    "is_active": "boolean",
+}
+PROVISION_DTYPES = {
+    **dict.fromkeys(PROVISION_TEXT_COLUMNS, TEXT_DTYPE),
+    "bsk_id": "Int32",
+    "bsk_name": "category",
+    "service_id": "Int32",
+    "service_name": "category",
+}
+
+# Date columns are stored as text; parse them once here with a fixed format
+DEO_DATE_FORMATS = {"date_of_engagement": "%Y-%m-%d"}
+PROVISION_DATE_FORMATS = {"prov_date": "%d/%m/%Y %H:%M:%S"}
+
+# ServiceMaster and BSKMaster are reference tables that rarely change, so
+# their DataFrames are cached per include_inactive flag for a few minutes.
+REFERENCE_CACHE_TTL = 300
+_services_cache = TTLCache(maxsize=4, ttl=REFERENCE_CACHE_TTL)
+_bsks_cache = TTLCache(maxsize=4, ttl=REFERENCE_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+
+def _get_cached_frame(cache: TTLCache, key) -> Optional[pd.DataFrame]:
+    """Return a shallow copy of a cached DataFrame, or None on a miss."""
+    with _cache_lock:
+        df = cache.get(key)
+    return None if df is None else df.copy(deep=False)
+
+
+def _set_cached_frame(cache: TTLCache, key, df: pd.DataFrame) -> pd.DataFrame:
+    """Store a DataFrame and hand back a copy callers are free to mutate."""
+    with _cache_lock:
+        cache[key] = df
+    return df.copy(deep=False)
+
+
+def invalidate_caches():
+    """Drop cached reference DataFrames, e.g. after writing to those tables."""
+    with _cache_lock:
+        _services_cache.clear()
+        _bsks_cache.clear()
+
+
+def _coalesce_text(column):
+    """Select a text column with NULLs replaced by empty strings in SQL."""
+    return func.coalesce(column, "").label(column.key)
+
+
+def _active_filter(model):
+    """
+    Build ``is_active = 1`` with the 1 rendered inline.
+
+    SQL Server only matches a filtered index (``WHERE is_active = 1``) when the
+    query predicate is a literal, not a bound parameter, so flag filters are
+    written this way for every table regardless of the column's type.
+    """
+    column = model.is_active
+    if isinstance(column.type, Boolean):
+        return column == true()
+    return column == literal_column("1")
+
+
+def _select_columns(model, columns, text_columns=()):
+    """Build a select() over just the named columns of a model."""
+    return select(
+        *(
+            (
+                _coalesce_text(getattr(model, name))
+                if name in text_columns
+                else getattr(model, name)
+            )
+            for name in columns
         )
+    )
 
-        print("✅ Database models imported successfully (alternative path)")
-    except ImportError as e2:
-        print(f"Warning: Could not import database models. Error: {e2}")
-        print(
-            "Make sure you're running from the project root and backend dependencies are installed."
+
+def _build_column(values: List, dtype=None, date_format: Optional[str] = None):
+    """Wrap one column's values, parsing dates once with an explicit format."""
+    if date_format is not None:
+        return pd.to_datetime(
+            pd.Series(values, dtype=object),
+            format=date_format,
+            errors="coerce",
+            cache=True,
         )
-        ServiceMaster = BSKMaster = DEOMaster = Provision = SessionLocal = None
+    return pd.Series(values, dtype=dtype)
+
+
+def _frame_from_columns(
+    columns: List[str],
+    values: List,
+    dtypes: Optional[Dict] = None,
+    date_formats: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Wrap per-column value lists in a DataFrame with the requested dtypes."""
+    dtypes = dtypes or {}
+    date_formats = date_formats or {}
+    return pd.DataFrame(
+        {
+            name: _build_column(column_values, dtypes.get(name), date_formats.get(name))
+            for name, column_values in zip(columns, values)
+        },
+        columns=columns,
+    )
+
+
+def _read_frame(
+    db: Session,
+    stmt,
+    dtypes: Optional[Dict] = None,
+    date_formats: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Execute a select and build its DataFrame column by column.
+
+    Each fetched batch of row tuples is transposed with zip(*rows) straight
+    into per-column lists, so pandas wraps ready-made columns instead of
+    transposing a list of records itself. Columns named in ``dtypes`` are
+    built directly with that dtype and columns named in ``date_formats`` are
+    parsed to datetime64 (unparseable or missing values become NaT).
+    """
+    result = db.execute(stmt)
+    columns = list(result.keys())
+    values = [[] for _ in columns]
+    for rows in result.partitions(FETCH_BATCH_SIZE):
+        for column_values, batch in zip(values, zip(*rows)):
+            column_values.extend(batch)
+    return _frame_from_columns(columns, values, dtypes, date_formats)
+
+
+def _iter_frames(
+    db: Session,
+    stmt,
+    chunksize: int,
+    dtypes: Optional[Dict] = None,
+    date_formats: Optional[Dict[str, str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Execute a select and yield one DataFrame per ``chunksize`` rows."""
+    result = db.execute(stmt)
+    columns = list(result.keys())
+    for rows in result.partitions(chunksize):
+        yield _frame_from_columns(columns, list(zip(*rows)), dtypes, date_formats)
 
 
 def get_database_session() -> Optional[Session]:
     """Get a database session."""
-    if SessionLocal is None:
-        print("SessionLocal not available - database models not imported")
+    models = _load_models()
+    if models is None:
+        logger.warning("SessionLocal not available - database models not imported")
         return None
 
     try:
-        return SessionLocal()
+        return models.SessionLocal()
     except Exception as e:
-        print(f"Error creating database session: {e}")
+        logger.error(f"Error creating database session: {e}")
         return None
 
 
-def fetch_services_from_db(include_inactive: bool = False) -> Optional[pd.DataFrame]:
+@contextmanager
+def _session_scope(db: Optional[Session] = None) -> Iterator[Optional[Session]]:
+    """
+    Yield ``db`` as-is, or a new session that is closed when the block exits.
+
+    Yields None if no session could be created.
+    """
+    if db is not None:
+        yield db
+        return
+
+    session = get_database_session()
+    if session is None:
+        yield None
+        return
+
+    with session:
+        yield session
+
+
+def fetch_services_from_db(
+    include_inactive: bool = False, db: Optional[Session] = None
+) -> Optional[pd.DataFrame]:
     """
     Fetch services data from ServiceMaster table.
 
     Args:
         include_inactive: Whether to include inactive services
+        db: Optional session to reuse; a new one is opened and closed if omitted
 
     Returns:
         DataFrame with service data or None if error
     """
-    if ServiceMaster is None:
-        print("ServiceMaster model not available")
+    models = _load_models()
+    if models is None:
+        logger.warning("ServiceMaster model not available")
         return None
 
-    db = get_database_session()
-    if db is None:
-        return None
+    # A caller-supplied session reads through so it sees its own transaction
+    owns_session = db is None
+    if owns_session:
+        cached_df = _get_cached_frame(_services_cache, include_inactive)
+        if cached_df is not None:
+            return cached_df
 
     try:
-        # Build query
-        query = db.query(ServiceMaster)
-        if not include_inactive:
-            query = query.filter(ServiceMaster.is_active == 1)
-
-        services = query.all()
-
-        if not services:
-            print("No services found in database")
-            return None
-
-        # Convert to DataFrame
-        services_data = []
-        for service in services:
-            services_data.append(
-                {
-                    "service_id": service.service_id,
-                    "service_name": service.service_name or "",
-                    "service_type": service.service_type or "",
-                    "service_desc": service.service_desc or "",
-                    "common_name": service.common_name or "",
-                    "department_name": service.department_name or "",
-                    "department_id": service.department_id,
-                    "how_to_apply": service.how_to_apply or "",
-                    "eligibility_criteria": service.eligibility_criteria or "",
-                    "required_doc": service.required_doc or "",
-                    "is_active": service.is_active,
-                    "is_paid_service": service.is_paid_service,
-                }
+        with _session_scope(db) as session:
+            if session is None:
+                return None
+
+            # Project only the columns the DataFrame needs
+            stmt = _select_columns(
+                models.ServiceMaster, SERVICE_COLUMNS, SERVICE_TEXT_COLUMNS
             )
+            if not include_inactive:
+                stmt = stmt.where(_active_filter(models.ServiceMaster))
+
+            services_df = _read_frame(session, stmt, SERVICE_DTYPES)
 
-        return pd.DataFrame(services_data)
+            if services_df.empty:
+                logger.warning("No services found in database")
+                return None
+
+            if owns_session:
+                return _set_cached_frame(_services_cache, include_inactive, services_df)
+            return services_df
 
     except Exception as e:
-        print(f"Error fetching services: {e}")
+        logger.error(f"Error fetching services: {e}")
         return None
-    finally:
-        db.close()
 
 
-def fetch_bsks_from_db(include_inactive: bool = False) -> Optional[pd.DataFrame]:
+def fetch_bsks_from_db(
+    include_inactive: bool = False, db: Optional[Session] = None
+) -> Optional[pd.DataFrame]:
     """
     Fetch BSK data from BSKMaster table.
 
     Args:
         include_inactive: Whether to include inactive BSKs
+        db: Optional session to reuse; a new one is opened and closed if omitted
 
     Returns:
         DataFrame with BSK data or None if error
     """
-    if BSKMaster is None:
-        print("BSKMaster model not available")
+    models = _load_models()
+    if models is None:
+        logger.warning("BSKMaster model not available")
         return None
 
-    db = get_database_session()
-    if db is None:
-        return None
+    # A caller-supplied session reads through so it sees its own transaction
+    owns_session = db is None
+    if owns_session:
+        cached_df = _get_cached_frame(_bsks_cache, include_inactive)
+        if cached_df is not None:
+            return cached_df
 
     try:
-        # Build query
-        query = db.query(BSKMaster)
-        if not include_inactive:
-            query = query.filter(BSKMaster.is_active == True)
-
-        bsks = query.all()
-
-        if not bsks:
-            print("No BSKs found in database")
-            return None
-
-        # Convert to DataFrame
-        bsk_data = []
-        for bsk in bsks:
-            bsk_data.append(
-                {
-                    "bsk_id": bsk.bsk_id,
-                    "bsk_name": bsk.bsk_name or "",
-                    "bsk_code": bsk.bsk_code or "",
-                    "district_name": bsk.district_name or "",
-                    "district_id": bsk.district_id,
-                    "block_municipalty_name": bsk.block_municipalty_name or "",
-                    "bsk_lat": bsk.bsk_lat,
-                    "bsk_long": bsk.bsk_long,
-                    "bsk_address": bsk.bsk_address or "",
-                    "is_active": bsk.is_active,
-                    "no_of_deos": bsk.no_of_deos,
-                }
-            )
+        with _session_scope(db) as session:
+            if session is None:
+                return None
+
+            # Project only the columns the DataFrame needs
+            stmt = _select_columns(models.BSKMaster, BSK_COLUMNS, BSK_TEXT_COLUMNS)
+            if not include_inactive:
+                stmt = stmt.where(_active_filter(models.BSKMaster))
 
-        return pd.DataFrame(bsk_data)
+            bsk_df = _read_frame(session, stmt, BSK_DTYPES)
+
+            if bsk_df.empty:
+                logger.warning("No BSKs found in database")
+                return None
+
+            if owns_session:
+                return _set_cached_frame(_bsks_cache, include_inactive, bsk_df)
+            return bsk_df
 
     except Exception as e:
-        print(f"Error fetching BSKs: {e}")
+        logger.error(f"Error fetching BSKs: {e}")
         return None
-    finally:
-        db.close()
 
 
-def fetch_deos_from_db(include_inactive: bool = False) -> Optional[pd.DataFrame]:
+def fetch_deos_from_db(
+    include_inactive: bool = False, db: Optional[Session] = None
+) -> Optional[pd.DataFrame]:
     """
     Fetch DEO data from DEOMaster table.
 
     Args:
         include_inactive: Whether to include inactive DEOs
+        db: Optional session to reuse; a new one is opened and closed if omitted
 
     Returns:
         DataFrame with DEO data or None if error
     """
-    if DEOMaster is None:
-        print("DEOMaster model not available")
-        return None
-
-    db = get_database_session()
-    if db is None:
+    models = _load_models()
+    if models is None:
+        logger.warning("DEOMaster model not available")
         return None
 
     try:
-        # Build query
-        query = db.query(DEOMaster)
-        if not include_inactive:
-            query = query.filter(DEOMaster.is_active == True)
-
-        deos = query.all()
-
-        if not deos:
-            print("No DEOs found in database")
-            return None
-
-        # Convert to DataFrame
-        deo_data = []
-        for deo in deos:
-            deo_data.append(
-                {
-                    "agent_id": deo.agent_id,
-                    "user_name": deo.user_name or "",
-                    "agent_code": deo.agent_code or "",
-                    "agent_email": deo.agent_email or "",
-                    "agent_phone": deo.agent_phone or "",
-                    "bsk_id": deo.bsk_id,
-                    "bsk_name": deo.bsk_name or "",
-                    "date_of_engagement": deo.date_of_engagement or "",
-                    "bsk_post": deo.bsk_post or "",
-                    "is_active": deo.is_active,
-                }
-            )
+        with _session_scope(db) as session:
+            if session is None:
+                return None
+
+            # Project only the columns the DataFrame needs
+            stmt = _select_columns(models.DEOMaster, DEO_COLUMNS, DEO_TEXT_COLUMNS)
+            if not include_inactive:
+                stmt = stmt.where(_active_filter(models.DEOMaster))
+
+            deos_df = _read_frame(session, stmt, DEO_DTYPES, DEO_DATE_FORMATS)
+
+            if deos_df.empty:
+                logger.warning("No DEOs found in database")
+                return None
 
-        return pd.DataFrame(deo_data)
+            return deos_df
 
     except Exception as e:
-        print(f"Error fetching DEOs: {e}")
+        logger.error(f"Error fetching DEOs: {e}")
         return None
-    finally:
-        db.close()
 
 
-def fetch_provisions_from_db(limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+def _provisions_select():
+    """Projected select over the Provision columns used by the recommender."""
+    return _select_columns(
+        _load_models().Provision, PROVISION_COLUMNS, PROVISION_TEXT_COLUMNS
+    )
+
+
+def fetch_provisions_from_db(
+    limit: Optional[int] = None,
+    db: Optional[Session] = None,
+    chunksize: Optional[int] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame], None]:
     """
     Fetch provisions data from Provision table.
 
     Args:
         limit: Maximum number of records to fetch (None for all)
+        db: Optional session to reuse; a new one is opened and closed if omitted
+        chunksize: If set, return an iterator of DataFrames with at most this
+            many rows each instead of one DataFrame
 
     Returns:
-        DataFrame with provisions data or None if error
+        DataFrame (or iterator of DataFrames) with provisions data or None if error
     """
-    if Provision is None:
-        print("Provision model not available")
+    models = _load_models()
+    if models is None:
+        logger.warning("Provision model not available")
         return None
 
-    db = get_database_session()
-    if db is None:
+    # Stream rows through a server-side cursor where the driver supports it
+    stmt = _provisions_select().execution_options(
+        stream_results=True, yield_per=FETCH_BATCH_SIZE
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+
+    if chunksize:
+        return _iter_provision_chunks(stmt, chunksize, db)
+
+    try:
+        with _session_scope(db) as session:
+            if session is None:
+                return None
+
+            provisions_df = _read_frame(
+                session, stmt, PROVISION_DTYPES, PROVISION_DATE_FORMATS
+            )
+
+            if provisions_df.empty:
+                logger.warning("No provisions found in database")
+                return None
+
+            return provisions_df
+
+    except Exception as e:
+        logger.error(f"Error fetching provisions: {e}")
         return None
 
+
+def _iter_provision_chunks(
+    stmt, chunksize: int, db: Optional[Session] = None
+) -> Iterator[pd.DataFrame]:
+    """Yield provision DataFrames from a single streamed query."""
     try:
-        query = db.query(Provision)
-        if limit:
-            query = query.limit(limit)
-
-        provisions = query.all()
-
-        if not provisions:
-            print("No provisions found in database")
-            return None
-
-        # Convert to DataFrame
-        provision_data = []
-        for provision in provisions:
-            provision_data.append(
-                {
-                    "bsk_id": provision.bsk_id,
-                    "bsk_name": provision.bsk_name or "",
-                    "customer_id": provision.customer_id,
-                    "customer_name": provision.customer_name or "",
-                    "customer_phone": provision.customer_phone or "",
-                    "service_id": provision.service_id,
-                    "service_name": provision.service_name or "",
-                    "prov_date": provision.prov_date or "",
-                    "docket_no": provision.docket_no or "",
-                }
+        with _session_scope(db) as session:
+            if session is None:
+                return
+
+            yield from _iter_frames(
+                session, stmt, chunksize, PROVISION_DTYPES, PROVISION_DATE_FORMATS
             )
+    except Exception as e:
+        logger.error(f"Error fetching provisions: {e}")
+
 
-        return pd.DataFrame(provision_data)
+def fetch_provisions_batches(
+    batch_size: int = FETCH_BATCH_SIZE, db: Optional[Session] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the Provision table in pages using keyset pagination.
+
+    Each page is its own ``WHERE customer_id > :last ORDER BY customer_id``
+    query limited to ``batch_size`` rows, so no cursor is held open between
+    pages and rows are never skipped or repeated the way OFFSET paging can.
+
+    Args:
+        batch_size: Number of rows per page
+        db: Optional session to reuse; a new one is opened and closed if omitted
+
+    Yields:
+        DataFrames with provisions data, ordered by customer_id
+    """
+    models = _load_models()
+    if models is None:
+        logger.warning("Provision model not available")
+        return
+
+    try:
+        with _session_scope(db) as session:
+            if session is None:
+                return
+
+            last_customer_id = None
+            while True:
+                stmt = _provisions_select().order_by(models.Provision.customer_id)
+                if last_customer_id is not None:
+                    stmt = stmt.where(models.Provision.customer_id > last_customer_id)
+
+                page_df = _read_frame(
+                    session,
+                    stmt.limit(batch_size),
+                    PROVISION_DTYPES,
+                    PROVISION_DATE_FORMATS,
+                )
+                if page_df.empty:
+                    return
+
+                yield page_df
+
+                if len(page_df) < batch_size:
+                    return
+                last_customer_id = page_df["customer_id"].iloc[-1]
 
     except Exception as e:
-        print(f"Error fetching provisions: {e}")
+        logger.error(f"Error fetching provision batches: {e}")
+
+
+def fetch_provision_counts_from_db(
+    group_by: Tuple[str, ...] = ("bsk_id", "service_id"),
+    db: Optional[Session] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Count provisions per group with a SQL GROUP BY.
+
+    Use this instead of fetch_provisions_from_db when only usage counts are
+    needed; the database returns one row per group rather than every
+    provision row.
+
+    Args:
+        group_by: Provision columns to group by
+        db: Optional session to reuse; a new one is opened and closed if omitted
+
+    Returns:
+        DataFrame with the group_by columns plus ``provision_count``, or None if
+        error
+    """
+    unknown_columns = set(group_by) - set(PROVISION_COLUMNS)
+    if unknown_columns:
+        raise ValueError(f"Cannot group provisions by {sorted(unknown_columns)}")
+
+    models = _load_models()
+    if models is None:
+        logger.warning("Provision model not available")
         return None
-    finally:
-        db.close()
+
+    try:
+        with _session_scope(db) as session:
+            if session is None:
+                return None
+
+            group_columns = [getattr(models.Provision, name) for name in group_by]
+            stmt = select(
+                *group_columns, func.count().label("provision_count")
+            ).group_by(*group_columns)
+
+            counts_df = _read_frame(
+                session, stmt, {**PROVISION_DTYPES, "provision_count": "int32"}
+            )
+
+            if counts_df.empty:
+                logger.warning("No provisions found in database")
+                return None
+
+            return counts_df
+
+    except Exception as e:
+        logger.error(f"Error counting provisions: {e}")
+        return None
+
+
+RECOMMENDATION_DATA_KEYS = ("services_df", "bsk_df", "deos_df", "provisions_df")
+
+
+def _fetch_all_in_snapshot(
+    include_inactive: bool, fetch_provisions
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """Run the four recommendation fetches in one read-consistent transaction."""
+    try:
+        with _session_scope() as db:
+            if db is None:
+                return dict.fromkeys(RECOMMENDATION_DATA_KEYS)
+
+            # SQL Server's SNAPSHOT isolation gives a true point-in-time view
+            # without holding shared locks; other backends get REPEATABLE READ.
+            isolation_level = (
+                "SNAPSHOT"
+                if db.get_bind().dialect.name == "mssql"
+                else "REPEATABLE READ"
+            )
+            db.connection(execution_options={"isolation_level": isolation_level})
+            return {
+                "services_df": fetch_services_from_db(include_inactive, db=db),
+                "bsk_df": fetch_bsks_from_db(include_inactive, db=db),
+                "deos_df": fetch_deos_from_db(include_inactive, db=db),
+                "provisions_df": fetch_provisions(db=db),
+            }
+    except Exception as e:
+        logger.error(f"Error starting snapshot transaction: {e}")
+        return dict.fromkeys(RECOMMENDATION_DATA_KEYS)
 
 
 def fetch_all_data_for_recommendations(
     include_inactive: bool = False,
+    consistent_snapshot: bool = False,
+    provision_counts: bool = False,
 ) -> Dict[str, Optional[pd.DataFrame]]:
     """
     Fetch all data needed for service recommendations.
 
     Args:
         include_inactive: Whether to include inactive records
+        consistent_snapshot: Read all four tables serially in one transaction so
+            they reflect the same point in time, instead of concurrently (and
+            bypassing the reference-table cache)
+        provision_counts: Return per (bsk_id, service_id) provision counts from
+            fetch_provision_counts_from_db instead of raw provision rows
 
     Returns:
         Dictionary with DataFrames for services, bsks, deos, and provisions
     """
-    print("Fetching all data from database...")
-
-    data = {
-        "services_df": fetch_services_from_db(include_inactive),
-        "bsk_df": fetch_bsks_from_db(include_inactive),
-        "deos_df": fetch_deos_from_db(include_inactive),
-        "provisions_df": fetch_provisions_from_db(),
-    }
+    logger.info("Fetching all data from database...")
+
+    fetch_provisions = (
+        fetch_provision_counts_from_db if provision_counts else fetch_provisions_from_db
+    )
+
+    if consistent_snapshot:
+        data = _fetch_all_in_snapshot(include_inactive, fetch_provisions)
+    else:
+        # The queries are independent, so run them concurrently. Each worker
+        # checks out its own pooled session; sessions are not thread-safe.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                "services_df": executor.submit(
+                    fetch_services_from_db, include_inactive
+                ),
+                "bsk_df": executor.submit(fetch_bsks_from_db, include_inactive),
+                "deos_df": executor.submit(fetch_deos_from_db, include_inactive),
+                "provisions_df": executor.submit(fetch_provisions),
+            }
+            data = {key: future.result() for key, future in futures.items()}
 
     # Print summary
     for key, df in data.items():
         if df is not None:
-            print(f"Loaded {len(df)} records for {key}")
+            logger.info(f"Loaded {len(df)} records for {key}")
         else:
-            print(f"Failed to load {key}")
+            logger.warning(f"Failed to load {key}")
 
     return data
 
 
 def test_database_connection() -> bool:
     """Test if database connection is working."""
-    try:
-        db = get_database_session()
-        if db is None:
-            return False
+    db = get_database_session()
+    if db is None:
+        return False
 
-        # Try a simple query
-        if ServiceMaster is not None:
-            count = db.query(ServiceMaster).count()
-            print(f"Database connection successful. Found {count} services.")
-            db.close()
+    try:
+        # Plain COUNT(*) on the table; ORM .count() wraps it in a subquery
+        models = _load_models()
+        if models is not None:
+            count = db.execute(
+                select(func.count()).select_from(models.ServiceMaster)
+            ).scalar()
+            logger.info(f"Database connection successful. Found {count} services.")
             return True
         else:
-            print("Database models not available")
+            logger.warning("Database models not available")
             return False
 
     except Exception as e:
-        print(f"Database connection failed: {e}")
+        logger.error(f"Database connection failed: {e}")
         return False
+    finally:
+        db.close()
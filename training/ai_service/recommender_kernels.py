@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to numpy scatter ops
+    njit = None
+
+
+def _count_pairs_numpy(group_codes, service_codes, n_groups, n_services):
+    out = np.zeros((n_groups, n_services), dtype=np.int32)
+    first_seen = np.full((n_groups, n_services), np.iinfo(np.int64).max, np.int64)
+    valid = (group_codes >= 0) & (service_codes >= 0)
+    rows = np.flatnonzero(valid)
+    np.add.at(out, (group_codes[valid], service_codes[valid]), 1)
+    np.minimum.at(first_seen, (group_codes[valid], service_codes[valid]), rows)
+    return out, first_seen
+
+
+if njit is not None:
+
+    # Scatter-adds into a shared matrix race under prange, so this stays serial;
+    # one compiled pass over the codes is already far cheaper than a pandas
+    # filter per group.
+    @njit(cache=True)
+    def _count_pairs_numba(group_codes, service_codes, n_groups, n_services):
+        out = np.zeros((n_groups, n_services), dtype=np.int32)
+        first_seen = np.full(
+            (n_groups, n_services), np.iinfo(np.int64).max, dtype=np.int64
+        )
+        for i in range(group_codes.shape[0]):
+            g = group_codes[i]
+            s = service_codes[i]
+            if g < 0 or s < 0:
+                continue
+            out[g, s] += 1
+            if first_seen[g, s] > i:
+                first_seen[g, s] = i
+        return out, first_seen
+
+    _count_pairs = _count_pairs_numba
+else:
+    _count_pairs = _count_pairs_numpy
+
+
+def count_pairs(
+    group_codes: np.ndarray,
+    service_codes: np.ndarray,
+    n_groups: int,
+    n_services: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count (group, service) pairs from integer codes in a single pass.
+
+    Args:
+        group_codes: Integer group code per row, negative for missing
+        service_codes: Integer service code per row, negative for missing
+        n_groups: Number of distinct groups
+        n_services: Number of distinct services
+
+    Returns:
+        Tuple of (counts, first_seen) matrices of shape (n_groups, n_services);
+        first_seen holds the first row index of each pair, for stable ordering
+    """
+    return _count_pairs(
+        np.ascontiguousarray(group_codes, dtype=np.int64),
+        np.ascontiguousarray(service_codes, dtype=np.int64),
+        n_groups,
+        n_services,
+    )
+
+
+def factorize_codes(values) -> Tuple[np.ndarray, list]:
+    """Encode values as integer codes (-1 for missing) and their unique values."""
+    codes, uniques = pd.factorize(pd.Series(values))
+    return codes, uniques.tolist()
+
+
+def top_services(
+    counts: np.ndarray, first_seen: np.ndarray, group_code: int, n: int
+) -> np.ndarray:
+    """
+    Return the service codes of a group's n most frequent services.
+
+    Ties keep the order in which services first appeared, matching
+    collections.Counter.most_common on the same rows.
+    """
+    row = counts[group_code]
+    present = np.flatnonzero(row)
+    order = np.lexsort((first_seen[group_code, present], -row[present]))
+    return present[order[:n]]
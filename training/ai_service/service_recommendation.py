@@ -360,11 +360,20 @@ def recommend_bsk_for_service(
     similar_services = services_df[services_df["total_similarity"] > 0.4]
     similar_service_ids = similar_services["service_id"].tolist()
 
-    # Usage analysis
+    # Usage analysis (provisions_df may hold raw rows or pre-aggregated
+    # provision_count rows from fetch_provision_counts_from_db)
     relevant_provisions = provisions_df[
         provisions_df["service_id"].isin(similar_service_ids)
     ]
-    bsk_counts = relevant_provisions["bsk_id"].value_counts().reset_index()
+    if "provision_count" in relevant_provisions.columns:
+        bsk_counts = (
+            relevant_provisions.groupby("bsk_id", observed=True)["provision_count"]
+            .sum()
+            .sort_values(ascending=False)
+            .reset_index()
+        )
+    else:
+        bsk_counts = relevant_provisions["bsk_id"].value_counts().reset_index()
     bsk_counts.columns = ["bsk_id", "usage_count"]
 
     # Geospatial analysis
@@ -467,12 +476,16 @@ def get_embedding_stats():
 
 
 # Database integration functions
-def get_recommendation_data_from_db(include_inactive: bool = False):
+def get_recommendation_data_from_db(
+    include_inactive: bool = False, provision_counts: bool = False
+):
     """
     Fetch all data needed for recommendations from the database.
 
     Args:
         include_inactive: Whether to include inactive records
+        provision_counts: Fetch per (bsk_id, service_id) provision counts
+            instead of raw provision rows
 
     Returns:
         Tuple of (services_df, bsk_df, deos_df, provisions_df) or None if error
@@ -480,7 +493,9 @@ def get_recommendation_data_from_db(include_inactive: bool = False):
     try:
         from .database_service import fetch_all_data_for_recommendations
 
-        data = fetch_all_data_for_recommendations(include_inactive)
+        data = fetch_all_data_for_recommendations(
+            include_inactive, provision_counts=provision_counts
+        )
 
         # Validate that we got all required data
         required_data = ["services_df", "bsk_df", "deos_df", "provisions_df"]
@@ -526,9 +541,9 @@ def recommend_bsk_for_service_from_db(
     Returns:
         DataFrame with recommended BSKs or None if error
     """
-    # Fetch data from database
+    # Fetch data from database; only usage counts are needed from provisions
     services_df, bsk_df, deos_df, provisions_df = get_recommendation_data_from_db(
-        include_inactive
+        include_inactive, provision_counts=True
     )
 
     if any(df is None for df in [services_df, bsk_df, provisions_df]):
@@ -12,17 +12,37 @@ Version: 1.0.0
 """
 
 # Standard library imports
+import asyncio
+import io
 import logging
 import os
 import sys
-from typing import List
-from contextlib import asynccontextmanager
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from contextlib import asynccontextmanager, suppress
 
 # Third-party imports
+import anyio.to_thread
+import orjson
 import pandas as pd
+import pyarrow as pa
+from cachetools import TTLCache, cached
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy import func, inspect as sa_inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 # Local application imports
@@ -39,9 +59,18 @@ from app.models.schemas import (
     ServiceVideoCreate,
     ServiceVideoUpdate,
 )
-from app.models.database import engine, get_db
+from app.models.database import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    SessionLocal,
+    engine,
+    get_db,
+)
 from typing import Optional
-from datetime import datetime
+
+# Rendered training videos, written by the Streamlit generator as
+# videos/<service_id>/<name>_v<version>.mp4
+VIDEOS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../videos"))
 
 # Configure module paths for AI service and training modules
 sys.path.append(
@@ -70,10 +99,13 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize database tables (idempotent operation for existing databases)
-logger.info("Initializing database tables...")
-models.Base.metadata.create_all(bind=engine)
-logger.info("Database initialization complete")
+# Initialize database tables (idempotent operation for existing databases).
+# create_all checks every table in the catalog on each worker boot; set
+# DB_AUTO_CREATE=0 where the schema is managed separately
+if os.getenv("DB_AUTO_CREATE", "1") == "1":
+    logger.info("Initializing database tables...")
+    models.Base.metadata.create_all(bind=engine)
+    logger.info("Database initialization complete")
 
 # ============================================================================
 # APPLICATION LIFECYCLE MANAGEMENT
@@ -111,6 +143,28 @@ async def lifespan(app: FastAPI):
     logger.info(f"Application Version: 1.0.0")
     logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
     logger.info("Database tables initialized successfully")
+
+    # Sync endpoints run on anyio's threadpool (40 threads by default); keep it
+    # at least as large as the connection pool so raising the pool size
+    # actually admits more concurrent queries. The extra threads cover the
+    # get_db dependency, which runs on the same pool
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    thread_limiter.total_tokens = max(
+        thread_limiter.total_tokens, 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    )
+    logger.info(f"Worker threads: {thread_limiter.total_tokens}")
+
+    # FastAPI builds the OpenAPI schema lazily and caches it on the app; build
+    # it now so the first /docs or /openapi.json request doesn't pay for it
+    app.openapi()
+
+    refresh_task = None
+    if ANALYTICS_REFRESH_MINUTES > 0:
+        refresh_task = asyncio.create_task(
+            refresh_analytics_periodically(ANALYTICS_REFRESH_MINUTES * 60)
+        )
+        logger.info(f"Analytics refresh every {ANALYTICS_REFRESH_MINUTES:g} min")
+
     logger.info("All systems ready - API is operational")
     logger.info("=" * 80)
 
@@ -120,6 +174,10 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 80)
     logger.info("BSK Training Optimization API - Shutting Down")
     logger.info("Performing cleanup tasks...")
+    if refresh_task is not None:
+        refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresh_task
     logger.info("Shutdown complete - Goodbye!")
     logger.info("=" * 80)
 
@@ -135,6 +193,9 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,  # Modern lifespan event handler
+    # orjson for every JSON body, not just the list endpoints that build
+    # ORJSONResponse themselves
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS middleware to allow cross-origin requests
@@ -151,63 +212,299 @@ app.add_middleware(
 # UTILITY FUNCTIONS
 # ============================================================================
 
+DEFAULT_PAGE_SIZE = 100  # list endpoints return every row only with all=true
+MAX_PAGE_SIZE = 1000
+PROVISION_STREAM_BATCH = 5000  # rows fetched and written per chunk
+MAX_RECOMMENDATIONS = 500  # most detailed training recommendations per request
+DATAFRAME_FETCH_BATCH = 100_000  # rows fetched per chunk of a loaded DataFrame
 
-def convert_models_to_dataframe(model_list: List) -> pd.DataFrame:
+# Master data changes on an hours scale but every analytics request needs all
+# four tables, so the DataFrames are shared between requests for half an hour
+MASTER_DATA_TTL = 30 * 60  # seconds
+_master_data_cache = TTLCache(maxsize=1, ttl=MASTER_DATA_TTL)
+_master_data_lock = threading.Lock()
+
+# Analytics results, keyed on (analysis, master data version) so they never
+# outlive the master data they were computed from
+_analytics_cache = TTLCache(maxsize=8, ttl=MASTER_DATA_TTL)
+_analytics_lock = threading.Lock()
+
+# Both are recomputed in the background shortly before the cached results
+# would expire, so requests are served precomputed results. Each worker runs
+# its own refresher, so keep this in minutes; 0 turns the refresher off and
+# results are computed on the first request after they expire instead
+ANALYTICS_REFRESH_MINUTES = float(os.getenv("ANALYTICS_REFRESH_MINUTES", "25"))
+
+
+def rank_underperforming_bsks(*frames) -> dict:
+    """
+    Score the BSKs and sort the result both ways once per master data
+    version, so requests only take the head of a ready ranking.
     """
-    Convert a list of SQLAlchemy model instances to a pandas DataFrame.
+    result_df = find_underperforming_bsks(*frames)
+    return {
+        order: result_df.sort_values(by="score", ascending=order == "asc")
+        for order in ("asc", "desc")
+    }
 
-    This utility function handles the conversion of ORM objects to a DataFrame
-    and removes SQLAlchemy's internal state tracking column.
+
+def recommend_training(*frames) -> dict:
+    """
+    Generate the training recommendations together with their summary, so
+    summary_only requests don't rebuild it from the list every time.
+
+    Only the MAX_RECOMMENDATIONS highest-priority recommendations can ever be
+    returned, so only those stay cached; the rest, with their service and DEO
+    lists, are released once the summary is built.
+    """
+    recommendations = training_recommendation(
+        *frames,
+        top_n_services=10,  # Consider top 10 services for each BSK
+        min_provision_threshold=10,  # Minimum provisions to be included in analysis
+    )
+    summary = {
+        "total_bsks_needing_training": len(recommendations),
+        "top_10_bsks": [
+            {
+                "bsk_id": rec["bsk_id"],
+                "bsk_name": rec["bsk_name"],
+                "priority_score": rec["priority_score"],
+                "total_training_services": rec["total_training_services"],
+            }
+            for rec in recommendations[:10]
+        ],
+    }
+    return {
+        "recommendations": recommendations[:MAX_RECOMMENDATIONS],
+        "total": len(recommendations),
+        "summary": summary,
+    }
+
+
+ANALYSES = {
+    "underperforming_bsks": rank_underperforming_bsks,
+    "training_recommendation": recommend_training,
+}
+
+# The analytics only read (or echo back) these columns of each master table;
+# addresses, account numbers, customer details and the long service texts stay
+# in the database. Provisions is by far the largest table.
+ANALYTICS_BSK_COLUMNS = [
+    "bsk_id",
+    "bsk_name",
+    "bsk_code",
+    "bsk_type",
+    "district_name",
+    "district_id",
+    "block_municipalty_name",
+    "bsk_lat",
+    "bsk_long",
+]
+ANALYTICS_PROVISION_COLUMNS = ["bsk_id", "service_id", "prov_date"]
+ANALYTICS_DEO_COLUMNS = [
+    "agent_id",
+    "user_name",
+    "agent_code",
+    "agent_email",
+    "agent_phone",
+    "bsk_id",
+    "bsk_post",
+    "date_of_engagement",
+    "is_active",
+]
+ANALYTICS_SERVICE_COLUMNS = [
+    "service_id",
+    "service_name",
+    "service_desc",
+    "service_type",
+]
+
+
+def fetch_table_dataframe(db: Session, model, columns=None) -> pd.DataFrame:
+    """
+    Load every row of a model's table into a pandas DataFrame.
+
+    Selects the mapped columns as plain rows instead of ORM instances, so no
+    objects are hydrated or tracked by the session. Rows are fetched and
+    turned into frames DATAFRAME_FETCH_BATCH at a time, so only one batch of
+    row tuples is held next to the frames, not the whole table.
 
     Args:
-        model_list: List of SQLAlchemy model instances
+        db: SQLAlchemy database session
+        model: SQLAlchemy model class
+        columns: Attribute names to load (default: every mapped column)
 
     Returns:
-        pd.DataFrame: DataFrame with model data, excluding internal state
+        pd.DataFrame: One column per selected attribute, in the given or
+        mapper order
     """
-    df = pd.DataFrame([item.__dict__ for item in model_list])
+    if columns is None:
+        columns = [attr.key for attr in sa_inspect(model).column_attrs]
+    stmt = select(*(getattr(model, name) for name in columns)).execution_options(
+        yield_per=DATAFRAME_FETCH_BATCH
+    )
+
+    # coerce_float=False keeps Decimal values as they come from the driver,
+    # as the ORM objects did
+    chunks = [
+        pd.DataFrame.from_records(rows, columns=columns, coerce_float=False)
+        for rows in db.execute(stmt).partitions()
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks, ignore_index=True)
 
-    # Remove SQLAlchemy internal state column if present
-    if "_sa_instance_state" in df.columns:
-        df.drop("_sa_instance_state", axis=1, inplace=True)
 
-    return df
+def fetch_table_in_own_session(model, columns=None) -> pd.DataFrame:
+    """fetch_table_dataframe on a short-lived session, for worker threads."""
+    with SessionLocal() as db:
+        return fetch_table_dataframe(db, model, columns)
 
 
-def fetch_all_master_data(db: Session) -> tuple:
+def arrow_schema(columns) -> pa.Schema:
+    """Arrow schema for selected model columns, in the same order."""
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+    return pa.schema(
+        [(col.key, types.get(col.type.python_type, pa.string())) for col in columns]
+    )
+
+
+def arrow_stream(batches, schema: pa.Schema):
+    """
+    Encode batches of row mappings as an Arrow IPC stream, yielding the bytes
+    of each record batch as soon as it is written.
+    """
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
+
+
+def fetch_page(
+    db: Session, model, schema, skip: int, limit: int, all_records: bool = False
+) -> List[dict]:
+    """
+    Fetch one page of a model's rows, ordered by primary key.
+
+    Ordering by the key keeps pages stable and lets the database walk the
+    key index; SQL Server also rejects OFFSET without ORDER BY. Only the
+    schema's fields are selected, as plain dicts in schema field order, so
+    pages can be serialized without building ORM or Pydantic objects.
+
+    Args:
+        db: SQLAlchemy database session
+        model: SQLAlchemy model class
+        schema: Pydantic response schema whose fields are returned
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        all_records: Ignore limit and return every record after skip
+
+    Returns:
+        List[dict]: One dict per row for the requested page
     """
-    Fetch all master data from database and convert to DataFrames.
+    columns = [getattr(model, name) for name in schema.model_fields]
+    stmt = select(*columns).order_by(*sa_inspect(model).primary_key).offset(skip)
+    if not all_records:
+        stmt = stmt.limit(limit)
+    return [dict(row) for row in db.execute(stmt).mappings()]
 
-    This function retrieves all records from the four main tables:
-    BSK Master, Provisions, DEO Master, and Service Master, and converts
-    them to pandas DataFrames for analytics processing.
+
+def cached_analytics(db: Session, name: str) -> tuple:
+    """
+    Run an analysis over the master data once per master data version.
 
     Args:
         db: SQLAlchemy database session
+        name: Key of the analysis in ANALYSES
 
     Returns:
-        tuple: (bsks_df, provisions_df, deos_df, services_df)
+        tuple: (result, etag); the result is shared between requests and must
+        not be modified, the ETag changes whenever the master data reloads
+    """
+    *frames, version = _load_master_data(db)
+    key = (name, version)
+    with _analytics_lock:
+        result = _analytics_cache.get(key)
+    if result is None:
+        result = ANALYSES[name](*(df.copy(deep=False) for df in frames))
+        with _analytics_lock:
+            _analytics_cache[key] = result
+    return result, f'"{version}"'
+
+
+def refresh_analytics():
+    """
+    Reload the master data and recompute every analysis, then swap both into
+    the caches together, so requests keep hitting warm results.
+    """
+    with SessionLocal() as db:
+        data = _load_master_data.__wrapped__(db)
+    *frames, version = data
+    results = {
+        (name, version): compute(*(df.copy(deep=False) for df in frames))
+        for name, compute in ANALYSES.items()
+    }
+    with _master_data_lock:
+        _master_data_cache["master"] = data
+    with _analytics_lock:
+        _analytics_cache.update(results)
+
+
+async def refresh_analytics_periodically(interval: float):
+    """Run refresh_analytics every interval seconds, off the event loop."""
+    while True:
+        try:
+            await anyio.to_thread.run_sync(refresh_analytics)
+        except Exception:
+            logger.exception("Background analytics refresh failed")
+        await asyncio.sleep(interval)
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag."""
+    return etag in request.headers.get("if-none-match", "")
+
+
+@cached(_master_data_cache, key=lambda db: "master", lock=_master_data_lock)
+def _load_master_data(db: Session) -> tuple:
+    """
+    Query the four master tables into DataFrames (uncached), followed by a
+    version string unique to this load.
     """
     logger.info("Fetching all master data from database...")
 
-    # Retrieve all records from each table
-    bsks = db.query(models.BSKMaster).all()
-    provisions = db.query(models.Provision).all()
-    deos = db.query(models.DEOMaster).all()
-    services = db.query(models.ServiceMaster).all()
+    # Retrieve all records from each table straight into DataFrames. The
+    # small tables load on connections of their own while the provisions scan
+    # runs on the request's session, so the load takes about as long as the
+    # provisions query alone
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        bsks_future = executor.submit(
+            fetch_table_in_own_session, models.BSKMaster, ANALYTICS_BSK_COLUMNS
+        )
+        deos_future = executor.submit(
+            fetch_table_in_own_session, models.DEOMaster, ANALYTICS_DEO_COLUMNS
+        )
+        services_future = executor.submit(
+            fetch_table_in_own_session, models.ServiceMaster, ANALYTICS_SERVICE_COLUMNS
+        )
+        provisions_df = fetch_table_dataframe(
+            db, models.Provision, ANALYTICS_PROVISION_COLUMNS
+        )
+        bsks_df = bsks_future.result()
+        deos_df = deos_future.result()
+        services_df = services_future.result()
 
     logger.info(
-        f"Retrieved {len(bsks)} BSKs, {len(provisions)} provisions, "
-        f"{len(deos)} DEOs, {len(services)} services"
+        f"Retrieved {len(bsks_df)} BSKs, {len(provisions_df)} provisions, "
+        f"{len(deos_df)} DEOs, {len(services_df)} services"
     )
 
-    # Convert to DataFrames and clean up
-    bsks_df = convert_models_to_dataframe(bsks)
-    provisions_df = convert_models_to_dataframe(provisions)
-    deos_df = convert_models_to_dataframe(deos)
-    services_df = convert_models_to_dataframe(services)
-
-    return bsks_df, provisions_df, deos_df, services_df
+    version = f"{time.time_ns():x}"
+    return bsks_df, provisions_df, deos_df, services_df, version
 
 
 # ============================================================================
@@ -241,7 +538,15 @@ def read_root():
 @app.get("/bsk/", response_model=List[BSKMaster], tags=["BSK Master"])
 def get_bsk_list(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(None, ge=1, description="Maximum number of records to return"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of records to return",
+    ),
+    all_records: bool = Query(
+        False, alias="all", description="Return all records, ignoring limit"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -252,7 +557,8 @@ def get_bsk_list(
 
     Args:
         skip: Number of records to skip (for pagination)
-        limit: Maximum number of records to return (None = all records)
+        limit: Maximum number of records to return
+        all_records: Return all records after skip, ignoring limit
         db: Database session dependency
 
     Returns:
@@ -260,17 +566,10 @@ def get_bsk_list(
     """
     logger.info(f"GET /bsk/ - Fetching BSK list with skip={skip}, limit={limit}")
 
-    # Build query with offset
-    query = db.query(models.BSKMaster).offset(skip)
-
-    # Apply limit if specified
-    if limit is not None:
-        query = query.limit(limit)
-
-    bsk_list = query.all()
+    bsk_list = fetch_page(db, models.BSKMaster, BSKMaster, skip, limit, all_records)
     logger.info(f"Successfully retrieved {len(bsk_list)} BSK records")
 
-    return bsk_list
+    return ORJSONResponse(bsk_list)
 
 
 @app.get("/bsk/{bsk_code}", response_model=BSKMaster, tags=["BSK Master"])
@@ -308,7 +607,15 @@ def get_bsk(bsk_id: int, db: Session = Depends(get_db)):
 @app.get("/services/", response_model=List[ServiceMaster], tags=["Service Master"])
 def get_services(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(None, ge=1, description="Maximum number of records to return"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of records to return",
+    ),
+    all_records: bool = Query(
+        False, alias="all", description="Return all records, ignoring limit"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -319,7 +626,8 @@ def get_services(
 
     Args:
         skip: Number of records to skip (for pagination)
-        limit: Maximum number of records to return (None = all records)
+        limit: Maximum number of records to return
+        all_records: Return all records after skip, ignoring limit
         db: Database session dependency
 
     Returns:
@@ -327,17 +635,12 @@ def get_services(
     """
     logger.info(f"GET /services/ - Fetching services with skip={skip}, limit={limit}")
 
-    # Build query with offset
-    query = db.query(models.ServiceMaster).offset(skip)
-
-    # Apply limit if specified
-    if limit is not None:
-        query = query.limit(limit)
-
-    services = query.all()
+    services = fetch_page(
+        db, models.ServiceMaster, ServiceMaster, skip, limit, all_records
+    )
     logger.info(f"Successfully retrieved {len(services)} service records")
 
-    return services
+    return ORJSONResponse(services)
 
 
 @app.get(
@@ -383,7 +686,15 @@ def get_service(service_id: int, db: Session = Depends(get_db)):
 @app.get("/deo/", response_model=List[DEOMaster], tags=["DEO Master"])
 def get_deo_list(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(None, ge=1, description="Maximum number of records to return"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of records to return",
+    ),
+    all_records: bool = Query(
+        False, alias="all", description="Return all records, ignoring limit"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -394,7 +705,8 @@ def get_deo_list(
 
     Args:
         skip: Number of records to skip (for pagination)
-        limit: Maximum number of records to return (None = all records)
+        limit: Maximum number of records to return
+        all_records: Return all records after skip, ignoring limit
         db: Database session dependency
 
     Returns:
@@ -402,17 +714,10 @@ def get_deo_list(
     """
     logger.info(f"GET /deo/ - Fetching DEO list with skip={skip}, limit={limit}")
 
-    # Build query with offset
-    query = db.query(models.DEOMaster).offset(skip)
-
-    # Apply limit if specified
-    if limit is not None:
-        query = query.limit(limit)
-
-    deo_list = query.all()
+    deo_list = fetch_page(db, models.DEOMaster, DEOMaster, skip, limit, all_records)
     logger.info(f"Successfully retrieved {len(deo_list)} DEO records")
 
-    return deo_list
+    return ORJSONResponse(deo_list)
 
 
 @app.get("/deo/{agent_id}", response_model=DEOMaster, tags=["DEO Master"])
@@ -454,7 +759,15 @@ def get_deo(agent_id: int, db: Session = Depends(get_db)):
 @app.get("/provisions/", response_model=List[Provision], tags=["Provisions"])
 def get_provisions(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(None, ge=1, description="Maximum number of records to return"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of records to return",
+    ),
+    all_records: bool = Query(
+        False, alias="all", description="Return all records, ignoring limit"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -465,7 +778,8 @@ def get_provisions(
 
     Args:
         skip: Number of records to skip (for pagination)
-        limit: Maximum number of records to return (None = all records)
+        limit: Maximum number of records to return
+        all_records: Return all records after skip, ignoring limit
         db: Database session dependency
 
     Returns:
@@ -475,17 +789,58 @@ def get_provisions(
         f"GET /provisions/ - Fetching provisions with skip={skip}, limit={limit}"
     )
 
-    # Build query with offset
-    query = db.query(models.Provision).offset(skip)
+    provisions = fetch_page(db, models.Provision, Provision, skip, limit, all_records)
+    logger.info(f"Successfully retrieved {len(provisions)} provision records")
 
-    # Apply limit if specified
-    if limit is not None:
-        query = query.limit(limit)
+    return ORJSONResponse(provisions)
 
-    provisions = query.all()
-    logger.info(f"Successfully retrieved {len(provisions)} provision records")
 
-    return provisions
+@app.get("/provisions/stream", tags=["Provisions"])
+def stream_provisions(
+    output_format: str = Query(
+        "ndjson",
+        alias="format",
+        regex="^(ndjson|arrow)$",
+        description="'ndjson' (one JSON object per line) or 'arrow' (Arrow IPC stream)",
+    ),
+):
+    """
+    Stream every provision record as newline-delimited JSON or Arrow.
+
+    For clients that need the whole table: rows are fetched from the database
+    and written out PROVISION_STREAM_BATCH at a time, so memory stays flat
+    however large the table is. With format=arrow each batch goes out as an
+    Arrow record batch, which pandas/pyarrow clients read without parsing JSON.
+
+    Args:
+        output_format: Output format, 'ndjson' or 'arrow'
+
+    Returns:
+        StreamingResponse: The Provision fields for every record
+    """
+    logger.info(f"GET /provisions/stream - Streaming all provisions as {output_format}")
+    columns = [getattr(models.Provision, name) for name in Provision.model_fields]
+    stmt = select(*columns).execution_options(yield_per=PROVISION_STREAM_BATCH)
+
+    def batches():
+        # The session lives as long as the stream, not the request handler
+        db = SessionLocal()
+        try:
+            yield from db.execute(stmt).mappings().partitions()
+        finally:
+            db.close()
+
+    if output_format == "arrow":
+        return StreamingResponse(
+            arrow_stream(batches(), arrow_schema(columns)),
+            media_type="application/vnd.apache.arrow.stream",
+        )
+
+    def lines():
+        for batch in batches():
+            yield b"".join(orjson.dumps(dict(row)) + b"\n" for row in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.get("/provisions/{customer_id}", response_model=Provision, tags=["Provisions"])
@@ -531,6 +886,7 @@ def get_provision(customer_id: str, db: Session = Depends(get_db)):
 
 @app.get("/underperforming_bsks/", tags=["Analytics"])
 def get_underperforming_bsks(
+    request: Request,
     num_bsks: int = Query(50, ge=1, le=1000, description="Number of BSKs to return"),
     sort_order: str = Query(
         "asc", regex="^(asc|desc)$", description="Sort order: 'asc' or 'desc'"
@@ -544,9 +900,14 @@ def get_underperforming_bsks(
     across multiple dimensions (provision volume, service diversity, efficiency, etc.)
     and returns a ranked list of underperforming BSKs that require attention.
 
+    The analysis runs once per master data load and is shared between
+    requests. Responses carry an ETag; a matching If-None-Match gets an
+    empty 304.
+
     Args:
         num_bsks: Number of BSKs to return (1-1000)
         sort_order: Sort order for results - 'asc' (lowest performing first) or 'desc'
+        request: Incoming request, for If-None-Match
         db: Database session dependency
 
     Returns:
@@ -568,27 +929,31 @@ def get_underperforming_bsks(
         f"sort_order={sort_order}"
     )
 
-    # Fetch all master data from database
-    bsks_df, provisions_df, deos_df, services_df = fetch_all_master_data(db)
+    # Execute AI analytics to identify underperforming BSKs, unless this
+    # master data has been analysed already
+    rankings, etag = cached_analytics(db, "underperforming_bsks")
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
-    # Execute AI analytics to identify underperforming BSKs
-    logger.info("Running underperformance analysis...")
-    result_df = find_underperforming_bsks(bsks_df, provisions_df, deos_df, services_df)
-
-    # Sort results by performance score
-    ascending = sort_order == "asc"
-    result_df = result_df.sort_values(by="score", ascending=ascending).head(num_bsks)
+    # Results come ranked by performance score in both orders already
+    result_df = rankings[sort_order].head(num_bsks)
 
     logger.info(f"Analysis complete. Returning {len(result_df)} underperforming BSKs")
 
-    # Convert DataFrame to list of dictionaries for JSON response
-    return result_df.to_dict(orient="records")
+    # Convert DataFrame to list of dictionaries for JSON response. The
+    # records are plain Python and NumPy values, so they go straight to orjson
+    # rather than through FastAPI's recursive jsonable_encoder
+    return ORJSONResponse(result_df.to_dict(orient="records"), headers={"ETag": etag})
 
 
 @app.get("/service_training_recomendation/", tags=["Analytics"])
 def service_training_recommendation(
+    request: Request,
     limit: int = Query(
-        20, ge=1, le=500, description="Maximum recommendations to return"
+        20,
+        ge=1,
+        le=MAX_RECOMMENDATIONS,
+        description="Maximum recommendations to return",
     ),
     summary_only: bool = Query(
         False, description="Return summary instead of detailed recommendations"
@@ -608,9 +973,13 @@ def service_training_recommendation(
     - Service complexity and importance
     - Historical training effectiveness
 
+    Recommendations are generated once per master data load and shared
+    between requests, with the same ETag handling as /underperforming_bsks/.
+
     Args:
         limit: Maximum number of recommendations to return (1-500)
         summary_only: If True, returns only high-level summary statistics
+        request: Incoming request, for If-None-Match
         db: Database session dependency
 
     Returns:
@@ -655,44 +1024,24 @@ def service_training_recommendation(
         f"with limit={limit}, summary_only={summary_only}"
     )
 
-    # Fetch all master data from database
-    bsks_df, provisions_df, deos_df, services_df = fetch_all_master_data(db)
-
     # Generate AI-powered training recommendations
-    logger.info("Generating training recommendations...")
-    recommendations = training_recommendation(
-        bsks_df=bsks_df,
-        provisions_df=provisions_df,
-        deos_df=deos_df,
-        services_df=services_df,
-        top_n_services=10,  # Consider top 10 services for each BSK
-        min_provision_threshold=10,  # Minimum provisions to be included in analysis
-    )
+    result, etag = cached_analytics(db, "training_recommendation")
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
-    logger.info(f"Generated {len(recommendations)} training recommendations")
+    recommendations = result["recommendations"]
+    logger.info(f"Generated {result['total']} training recommendations")
 
     # Return summary if requested
     if summary_only:
-        summary = {
-            "total_bsks_needing_training": len(recommendations),
-            "top_10_bsks": [
-                {
-                    "bsk_id": rec["bsk_id"],
-                    "bsk_name": rec["bsk_name"],
-                    "priority_score": rec["priority_score"],
-                    "total_training_services": rec["total_training_services"],
-                }
-                for rec in recommendations[:10]
-            ],
-        }
         logger.info("Returning summary of recommendations")
-        return summary
+        return ORJSONResponse(result["summary"], headers={"ETag": etag})
 
     # Return detailed recommendations up to limit
     logger.info(
         f"Returning {min(limit, len(recommendations))} detailed recommendations"
     )
-    return recommendations[:limit]
+    return ORJSONResponse(recommendations[:limit], headers={"ETag": etag})
 
 
 # POST endpoint - Creates NEW record or UPDATES existing
@@ -700,33 +1049,41 @@ def service_training_recommendation(
 def create_or_update_service_video(
     video: ServiceVideoCreate, db: Session = Depends(get_db)
 ):
-    """Create or update video record for a service"""
+    """
+    Create or update video record for a service
 
-    # Check if record already exists
-    existing_video = (
-        db.query(models.ServiceVideo)
-        .filter(models.ServiceVideo.service_id == video.service_id)
-        .first()
+    Tries the UPDATE first and INSERTs only when no row matched; both return
+    the row in the same statement, so there is no SELECT before the write and
+    no ORM object to refresh afterwards.
+    """
+    table = models.ServiceVideo
+    returned = [getattr(table, name) for name in ServiceVideo.model_fields]
+    # ✅ UPDATE existing record - increment version
+    update_stmt = (
+        update(table)
+        .where(table.service_id == video.service_id)
+        .values(
+            video_version=video.video_version,
+            source_type=video.source_type,
+            is_new=True,
+            is_done=False,
+            updated_at=func.now(),
+        )
+        .returning(*returned)
     )
 
-    if existing_video:
-        # ✅ UPDATE existing record - increment version
-        existing_video.video_version = video.video_version
-        existing_video.source_type = video.source_type
-        existing_video.is_new = True
-        existing_video.is_done = False
-        existing_video.updated_at = datetime.now()
-
-        db.commit()
-        db.refresh(existing_video)
-        return existing_video
-    else:
+    row = db.execute(update_stmt).mappings().first()
+    if row is None:
         # ✅ CREATE new record
-        db_video = models.ServiceVideo(**video.dict())
-        db.add(db_video)
-        db.commit()
-        db.refresh(db_video)
-        return db_video
+        try:
+            insert_stmt = insert(table).values(**video.dict()).returning(*returned)
+            row = db.execute(insert_stmt).mappings().one()
+        except IntegrityError:
+            # Another request created the row between the UPDATE and INSERT
+            db.rollback()
+            row = db.execute(update_stmt).mappings().one()
+    db.commit()
+    return dict(row)
 
 
 # GET endpoint - Get video info for a service
@@ -749,6 +1106,27 @@ def get_service_video(service_id: int, db: Session = Depends(get_db)):
     return video
 
 
+# POST endpoint - Get video info for many services at once
+@app.post(
+    "/service_videos/batch",
+    response_model=Dict[int, ServiceVideo],
+    tags=["Service Videos"],
+)
+def get_service_videos(
+    ids: List[int] = Body(..., max_length=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Get video records for a list of services, keyed by service_id
+
+    One IN query instead of a request per service; services without a video
+    are simply absent from the result.
+    """
+    table = models.ServiceVideo
+    rows = db.execute(select(table).where(table.service_id.in_(set(ids)))).scalars()
+    return {video.service_id: video for video in rows}
+
+
 # PUT endpoint - Update video record
 @app.put(
     "/service_videos/{service_id}",
@@ -774,7 +1152,9 @@ def update_service_video(
     for key, value in video_update.dict(exclude_unset=True).items():
         setattr(video, key, value)
 
-    video.updated_at = datetime.now()
+    # Stamp explicitly: an unchanged record flushes no UPDATE, so the column's
+    # onupdate would not fire
+    video.updated_at = func.now()
     db.commit()
     db.refresh(video)
     return video
@@ -794,7 +1174,56 @@ def mark_video_as_old(service_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Video record not found")
 
     video.is_new = False
-    video.updated_at = datetime.now()
+    video.updated_at = func.now()
     db.commit()
 
     return {"status": "success", "service_id": service_id}
+
+
+# PATCH endpoint - Mark many videos as old in one statement
+@app.patch("/service_videos/mark_old/batch", tags=["Service Videos"])
+def mark_videos_as_old(
+    ids: List[int] = Body(..., max_length=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Mark the videos of several services as no longer new"""
+    table = models.ServiceVideo
+    result = db.execute(
+        update(table)
+        .where(table.service_id.in_(set(ids)), table.is_new)
+        .values(is_new=False)
+    )
+    db.commit()
+
+    return {"status": "success", "updated": result.rowcount}
+
+
+# GET endpoint - Stream a rendered video file
+@app.get("/videos/{service_id}/{version}", tags=["Service Videos"])
+def stream_video(
+    service_id: int,
+    version: int,
+    download: bool = Query(False, description="Send as an attachment"),
+):
+    """
+    Serve a rendered training video from disk.
+
+    FileResponse answers HTTP range requests, so players can seek and fetch
+    only what they show, and the file is sent without being read into memory.
+    """
+    suffix = f"_v{version}.mp4"
+    try:
+        with os.scandir(os.path.join(VIDEOS_DIR, str(service_id))) as entries:
+            entry = next((e for e in entries if e.name.endswith(suffix)), None)
+    except FileNotFoundError:
+        entry = None
+
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Video file not found")
+
+    return FileResponse(
+        entry.path,
+        media_type="video/mp4",
+        filename=entry.name,
+        content_disposition_type="attachment" if download else "inline",
+    )
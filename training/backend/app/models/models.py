@@ -8,8 +8,8 @@ Author: BSK Team
 Version: 2.0.0
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, Text, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, Float, Text, DateTime, Index
+from sqlalchemy.sql import func, text
 from datetime import datetime, timezone
 from .database import Base
 
@@ -28,7 +28,16 @@ class BSKMaster(Base):
     """
 
     __tablename__ = "ml_bsk_master"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # Filtered index for the common "active BSKs only" read
+        Index(
+            "ix_ml_bsk_master_active",
+            "bsk_id",
+            mssql_where=text("is_active = 1"),
+            mssql_include=["district_id", "no_of_deos"],
+        ),
+        {"schema": "dbo"},
+    )
 
     # Primary Key
     bsk_id = Column(
@@ -83,7 +92,16 @@ class DEOMaster(Base):
     """
 
     __tablename__ = "ml_deo_master"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # Filtered index for the common "active DEOs only" read
+        Index(
+            "ix_ml_deo_master_active",
+            "agent_id",
+            mssql_where=text("is_active = 1"),
+            mssql_include=["bsk_id"],
+        ),
+        {"schema": "dbo"},
+    )
 
     # Primary Key
     agent_id = Column(
@@ -137,7 +155,17 @@ class ServiceMaster(Base):
     """
 
     __tablename__ = "ml_service_master"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # Filtered covering index for the common "active services only" read
+        Index(
+            "ix_ml_service_master_active",
+            "is_active",
+            "service_id",
+            mssql_where=text("is_active = 1"),
+            mssql_include=["service_name", "department_id"],
+        ),
+        {"schema": "dbo"},
+    )
 
     # Primary Key
     service_id = Column(
@@ -183,7 +211,12 @@ class Provision(Base):
     """
 
     __tablename__ = "ml_provision"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # Composite index for per-(BSK, service) counts; the grouping reads
+        # this index alone instead of the table
+        Index("ix_ml_provision_bsk_service", "bsk_id", "service_id"),
+        {"schema": "dbo"},
+    )
 
     # Primary Key
     customer_id = Column(Text, primary_key=True, comment="Unique customer identifier")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -29,8 +29,7 @@ class BSKMaster(BaseModel):
     sub_div_id: Optional[int]
     pin: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ServiceMaster(BaseModel):
@@ -50,16 +49,14 @@ class ServiceMaster(BaseModel):
     eligibility_criteria: Optional[str]
     required_doc: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DepartmentMaster(BaseModel):
     department_id: int
     department_name: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DEOMaster(BaseModel):
@@ -83,8 +80,7 @@ class DEOMaster(BaseModel):
     is_active: Optional[bool]
     bsk_post: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CitizenMaster(BaseModel):
@@ -105,8 +101,7 @@ class CitizenMaster(BaseModel):
     caste: str
     religion: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DistrictMaster(BaseModel):
@@ -115,8 +110,7 @@ class DistrictMaster(BaseModel):
     slave_db: str
     district_code: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 from pydantic import BaseModel
@@ -134,8 +128,7 @@ class Provision(BaseModel):
     prov_date: Optional[str]
     docket_no: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BSKTransaction(BaseModel):
@@ -152,8 +145,7 @@ class BSKTransaction(BaseModel):
     service_id: int
     service_name: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BlockMunicipality(BaseModel):
@@ -163,8 +155,7 @@ class BlockMunicipality(BaseModel):
     district_id: Optional[int]
     bm_type: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CitizenMasterV2(BaseModel):
@@ -183,16 +174,14 @@ class CitizenMasterV2(BaseModel):
     caste: Optional[str]
     religion: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DepartmentMaster(BaseModel):
     dept_id: int
     dept_name: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class District(BaseModel):
@@ -201,8 +190,7 @@ class District(BaseModel):
     district_code: Optional[str]
     grp: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GPWardMaster(BaseModel):
@@ -212,8 +200,7 @@ class GPWardMaster(BaseModel):
     block_muni_id: Optional[str]
     gp_ward_name: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PostOfficeMaster(BaseModel):
@@ -222,8 +209,7 @@ class PostOfficeMaster(BaseModel):
     pin_code: Optional[str]
     district_id: Optional[int]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ServiceVideoBase(BaseModel):
@@ -251,5 +237,4 @@ class ServiceVideo(ServiceVideoBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
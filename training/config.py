@@ -4,6 +4,8 @@ Loads all settings from environment variables with proper fallbacks
 """
 
 import os
+import platform
+import shutil
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -77,20 +79,29 @@ AVATAR_IMAGE = ASSETS_DIR / "avatar" / "avatar.png"
 AVATAR_HEIGHT = 220
 
 # ============================================================
-# OCR CONFIGURATION (Platform-specific)
+# EXTERNAL TOOLS (Platform-specific)
 # ============================================================
-import platform
-import shutil
+IS_WINDOWS = platform.system() == "Windows"
+
 
-# Auto-detect Tesseract installation
-if platform.system() == "Windows":
-    TESSERACT_PATHS = [
-        r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-        r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-    ]
-    TESSERACT_CMD = next((p for p in TESSERACT_PATHS if os.path.exists(p)), None)
-else:
-    TESSERACT_CMD = shutil.which("tesseract")
+def find_binary(windows_paths, *names):
+    """
+    Locate an external tool: the first of its usual install paths that
+    exists on Windows, otherwise the first of names found on PATH
+    """
+    if IS_WINDOWS:
+        return next((p for p in windows_paths if os.path.exists(p)), None)
+    return next(filter(None, map(shutil.which, names)), None)
+
+
+# ============================================================
+# OCR CONFIGURATION (Platform-specific)
+# ============================================================
+TESSERACT_PATHS = (
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+)
+TESSERACT_CMD = find_binary(TESSERACT_PATHS, "tesseract")
 
 OCR_AVAILABLE = TESSERACT_CMD is not None
 OCR_DPI = 300
@@ -98,15 +109,12 @@ OCR_DPI = 300
 # ============================================================
 # IMAGEMAGICK CONFIGURATION (Platform-specific)
 # ============================================================
-if platform.system() == "Windows":
-    IMAGEMAGICK_PATHS = [
-        r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe",
-        r"C:\Program Files\ImageMagick\magick.exe",
-        r"C:\Program Files (x86)\ImageMagick\magick.exe",
-    ]
-    IMAGEMAGICK_BINARY = next((p for p in IMAGEMAGICK_PATHS if os.path.exists(p)), None)
-else:
-    IMAGEMAGICK_BINARY = shutil.which("magick") or shutil.which("convert")
+IMAGEMAGICK_PATHS = (
+    r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe",
+    r"C:\Program Files\ImageMagick\magick.exe",
+    r"C:\Program Files (x86)\ImageMagick\magick.exe",
+)
+IMAGEMAGICK_BINARY = find_binary(IMAGEMAGICK_PATHS, "magick", "convert")
 
 
 # ============================================================
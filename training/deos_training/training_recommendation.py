@@ -1,9 +1,20 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from collections import Counter
 from typing import Dict, List
-import json
+import orjson
+
+
+def column_values(df: pd.DataFrame, name: str, default) -> list:
+    """
+    Values of a column as plain Python objects, the way to_dict() gives them
+    (pd.NA from Arrow-backed columns becomes None), or default for every row
+    when the column is missing.
+    """
+    if name not in df:
+        return [default] * len(df)
+    return [None if value is pd.NA else value for value in df[name].tolist()]
 
 
 def training_recommendation(
@@ -14,6 +25,7 @@ def training_recommendation(
     top_n_services: int = 10,
     min_provision_threshold: int = 5,
     n_clusters: int = None,
+    precomputed_counts: pd.DataFrame = None,
 ) -> List[Dict]:
     """
     Generate training recommendations for BSKs/DEOs based on cluster analysis.
@@ -34,6 +46,9 @@ def training_recommendation(
         top_n_services: Number of top services to consider per cluster (default: 10)
         min_provision_threshold: Minimum provisions to not need training (default: 5)
         n_clusters: Number of clusters (default: sqrt of total BSKs)
+        precomputed_counts: Provision counts already grouped by bsk_id and
+            service_id (column provision_count), e.g. by the database; when
+            given, provisions_df is not used and may be None
 
     Returns:
         List of dictionaries with training recommendations in JSON-compatible format
@@ -52,6 +67,7 @@ def training_recommendation(
 
     # Remove BSKs without valid coordinates
     bsks = bsks.dropna(subset=["bsk_lat", "bsk_long", "bsk_id"])
+    bsks = bsks.astype({"bsk_id": np.int64})
 
     if len(bsks) == 0:
         print("❌ No valid BSKs with coordinates found")
@@ -66,31 +82,50 @@ def training_recommendation(
     if n_clusters is None:
         n_clusters = max(int(np.sqrt(len(bsks))), 1)
 
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    bsks["cluster_id"] = kmeans.fit_predict(bsks[["bsk_lat", "bsk_long"]])
+    # Mini-batch k-means with a few restarts: on 2-D coordinates it lands
+    # close to full Lloyd iterations with ten restarts, in a fraction of the time
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters, random_state=42, n_init=3, batch_size=4096
+    )
+    bsks["cluster_id"] = kmeans.fit_predict(bsks[["bsk_lat", "bsk_long"]].to_numpy())
     print(f"   ✓ Created {n_clusters} clusters")
 
     # ----------------------------
     # 3. PRE-AGGREGATE PROVISIONS (KEY OPTIMIZATION!)
     # This runs ONCE on the full dataset instead of repeatedly
     # ----------------------------
-    print("[3/6] Pre-aggregating provision data (this is the heavy lifting)...")
-
-    prov = provisions_df.copy()
-    prov["bsk_id"] = pd.to_numeric(prov["bsk_id"], errors="coerce")
-    prov["service_id"] = pd.to_numeric(prov["service_id"], errors="coerce")
-
-    # Drop invalid records early
-    prov = prov.dropna(subset=["bsk_id", "service_id"])
-    print(f"   ✓ Processing {len(prov)} provision records...")
-
-    # CRITICAL OPTIMIZATION: Aggregate to BSK-Service level ONCE
-    # This reduces 1.66M rows to ~few thousand rows
-    bsk_service_counts = (
-        prov.groupby(["bsk_id", "service_id"])
-        .size()
-        .reset_index(name="provision_count")
-    )
+    if precomputed_counts is not None:
+        print("[3/6] Using pre-aggregated provision counts...")
+        bsk_service_counts = precomputed_counts[
+            ["bsk_id", "service_id", "provision_count"]
+        ].copy()
+        for col in ("bsk_id", "service_id"):
+            bsk_service_counts[col] = pd.to_numeric(
+                bsk_service_counts[col], errors="coerce"
+            )
+        bsk_service_counts = bsk_service_counts.dropna(
+            subset=["bsk_id", "service_id"]
+        ).astype({"bsk_id": np.int64, "service_id": np.int64})
+    else:
+        print("[3/6] Pre-aggregating provision data (this is the heavy lifting)...")
+
+        prov = provisions_df.copy()
+        prov["bsk_id"] = pd.to_numeric(prov["bsk_id"], errors="coerce")
+        prov["service_id"] = pd.to_numeric(prov["service_id"], errors="coerce")
+
+        # Drop invalid records early
+        prov = prov.dropna(subset=["bsk_id", "service_id"]).astype(
+            {"bsk_id": np.int64, "service_id": np.int64}
+        )
+        print(f"   ✓ Processing {len(prov)} provision records...")
+
+        # CRITICAL OPTIMIZATION: Aggregate to BSK-Service level ONCE
+        # This reduces 1.66M rows to ~few thousand rows
+        bsk_service_counts = (
+            prov.groupby(["bsk_id", "service_id"])
+            .size()
+            .reset_index(name="provision_count")
+        )
     print(f"   ✓ Aggregated to {len(bsk_service_counts)} BSK-Service combinations")
 
     # Add cluster info to aggregated data
@@ -110,22 +145,24 @@ def training_recommendation(
         .reset_index()
     )
 
-    # Get top N services per cluster
-    cluster_top_services = {}
-    for cluster_id in range(n_clusters):
-        cluster_data = cluster_service_totals[
-            cluster_service_totals["cluster_id"] == cluster_id
-        ]
-
-        if len(cluster_data) == 0:
-            cluster_top_services[cluster_id] = []
-            continue
-
-        # Sort by provision count and get top N
-        top_services = cluster_data.nlargest(top_n_services, "provision_count")[
-            "service_id"
-        ].tolist()
-        cluster_top_services[cluster_id] = top_services
+    # Get top N services per cluster in one sort, instead of filtering the
+    # totals once per cluster. The stable sort keeps ties in service order,
+    # as nlargest did
+    top_rows = (
+        cluster_service_totals.sort_values(
+            ["cluster_id", "provision_count"], ascending=[True, False], kind="stable"
+        )
+        .groupby("cluster_id", sort=False)
+        .head(top_n_services)
+    )
+    top_by_cluster = {
+        int(cluster_id): services.tolist()
+        for cluster_id, services in top_rows.groupby("cluster_id")["service_id"]
+    }
+    cluster_top_services = {
+        cluster_id: top_by_cluster.get(cluster_id, [])
+        for cluster_id in range(n_clusters)
+    }
 
     print(f"   ✓ Identified top services for {len(cluster_top_services)} clusters")
 
@@ -148,14 +185,19 @@ def training_recommendation(
         cluster_service_avg["provision_count"] / cluster_service_avg["bsk_count"]
     )
 
-    # Create lookup dictionary for fast access
-    cluster_service_avg_dict = {}
-    for _, row in cluster_service_avg.iterrows():
-        key = (int(row["cluster_id"]), int(row["service_id"]))
-        cluster_service_avg_dict[key] = row["avg_provisions"]
+    # Dense lookup tables indexed by contiguous codes instead of dicts keyed
+    # by (id, id) tuples: cluster ids already run 0..n_clusters-1, service ids
+    # are re-encoded by their position in service_index
+    service_index = pd.Index(bsk_service_counts["service_id"].unique())
+
+    cluster_avg_mat = np.zeros((n_clusters, len(service_index)))
+    cluster_avg_mat[
+        cluster_service_avg["cluster_id"].astype(np.int64).to_numpy(),
+        service_index.get_indexer(cluster_service_avg["service_id"]),
+    ] = cluster_service_avg["avg_provisions"].to_numpy()
 
     print(
-        f"   ✓ Calculated benchmarks for {len(cluster_service_avg_dict)} cluster-service pairs"
+        f"   ✓ Calculated benchmarks for {len(cluster_service_avg)} cluster-service pairs"
     )
 
     # ----------------------------
@@ -163,118 +205,161 @@ def training_recommendation(
     # ----------------------------
     print("[6/6] Generating recommendations...")
 
-    # Convert bsk_service_counts to dict for fast lookup
-    bsk_service_dict = {}
-    for _, row in bsk_service_counts.iterrows():
-        key = (int(row["bsk_id"]), int(row["service_id"]))
-        bsk_service_dict[key] = row["provision_count"]
-
-    # Prepare services lookup for details
-    services_lookup = services_df.set_index("service_id").to_dict("index")
+    # Provision counts as a (BSK, service) matrix, rows in the order of bsks;
+    # counts for BSKs that are not in bsks are dropped
+    bsk_row_codes, bsk_uniques = pd.factorize(bsks["bsk_id"])
+    count_rows = pd.Index(bsk_uniques).get_indexer(bsk_service_counts["bsk_id"])
+    count_cols = service_index.get_indexer(bsk_service_counts["service_id"])
+    known = count_rows >= 0
+    bsk_prov_mat = np.zeros((len(bsk_uniques), len(service_index)), dtype=np.int32)
+    np.add.at(
+        bsk_prov_mat,
+        (count_rows[known], count_cols[known]),
+        bsk_service_counts["provision_count"].to_numpy(dtype=np.int32)[known],
+    )
 
-    # Prepare DEOs lookup
-    deos_by_bsk = (
-        deos_df.groupby("bsk_id").apply(lambda x: x.to_dict("records")).to_dict()
+    # Service details, stringified once per service rather than per pair
+    service_details = pd.DataFrame({"service_id": services_df["service_id"]})
+    for name, default in (
+        ("service_name", "Unknown"),
+        ("service_type", "N/A"),
+        ("service_desc", ""),
+    ):
+        service_details[name] = [
+            str(value) for value in column_values(services_df, name, default)
+        ]
+    service_details["service_desc"] = service_details["service_desc"].str.slice(0, 200)
+
+    # Prepare DEOs lookup: DEO records are built column-wise, then sliced per
+    # BSK at the group offsets of one stable sort, which keeps each BSK's
+    # DEOs in their original order
+    deos = deos_df[deos_df["bsk_id"].notna()].sort_values("bsk_id", kind="stable")
+    deo_keys, deo_starts = np.unique(deos["bsk_id"].to_numpy(), return_index=True)
+    deo_ends = np.append(deo_starts[1:], len(deos))
+    deo_columns = {
+        name: [str(value) for value in column_values(deos, name, "")]
+        for name in (
+            "agent_id",
+            "user_name",
+            "agent_code",
+            "agent_email",
+            "agent_phone",
+            "bsk_post",
+        )
+    }
+    deo_columns["is_active"] = [
+        bool(value) for value in column_values(deos, "is_active", False)
+    ]
+    deo_records = [dict(zip(deo_columns, row)) for row in zip(*deo_columns.values())]
+    deos_by_bsk = {
+        key: deo_records[start:end]
+        for key, start, end in zip(deo_keys.tolist(), deo_starts, deo_ends)
+    }
+
+    # Every (BSK, top service of its cluster) pair, in bsks order and then in
+    # the cluster's ranking, with the BSK's provisions and the cluster
+    # benchmark gathered from the matrices in one go
+    ranked_top = top_rows.assign(rank=top_rows.groupby("cluster_id").cumcount())
+    candidates = (
+        pd.DataFrame(
+            {
+                "bsk_pos": np.arange(len(bsks)),
+                "bsk_code": bsk_row_codes,
+                "cluster_id": bsks["cluster_id"].to_numpy(),
+            }
+        )
+        .merge(ranked_top[["cluster_id", "service_id", "rank"]], on="cluster_id")
+        .sort_values(["bsk_pos", "rank"], kind="stable")
     )
+    service_cols = service_index.get_indexer(candidates["service_id"])
+    candidates["provision_count"] = bsk_prov_mat[
+        candidates["bsk_code"].to_numpy(), service_cols
+    ]
+    candidates["cluster_avg"] = cluster_avg_mat[
+        candidates["cluster_id"].astype(np.int64).to_numpy(), service_cols
+    ]
+
+    # Services below the threshold are recommended for training, as long as
+    # the service is known
+    candidates = candidates[
+        candidates["provision_count"] < min_provision_threshold
+    ].merge(service_details, on="service_id", validate="many_to_one")
+    candidates["gap"] = candidates["cluster_avg"] - candidates["provision_count"]
+
+    # Only the JSON packaging is left per BSK, over the runs of each bsk_pos
+    positions = candidates["bsk_pos"].to_numpy()
+    run_starts = np.flatnonzero(np.diff(positions, prepend=-1))
+    run_ends = np.append(run_starts[1:], len(positions))
+    service_ids = candidates["service_id"].tolist()
+    provision_counts = candidates["provision_count"].tolist()
+    cluster_avgs = candidates["cluster_avg"].tolist()
+    gaps = candidates["gap"].tolist()
+    service_names = candidates["service_name"].tolist()
+    service_types = candidates["service_type"].tolist()
+    service_descs = candidates["service_desc"].tolist()
+
+    bsk_columns = {
+        name: bsks[name].to_numpy(dtype=object)
+        for name in (
+            "bsk_name",
+            "bsk_code",
+            "district_name",
+            "block_municipalty_name",
+            "bsk_type",
+        )
+        if name in bsks
+    }
+    bsk_ids = bsks["bsk_id"].tolist()
+    cluster_ids = bsks["cluster_id"].tolist()
+    bsk_lats = bsks["bsk_lat"].to_numpy()
+    bsk_longs = bsks["bsk_long"].to_numpy()
+
+    def bsk_field(name, pos):
+        return str(bsk_columns[name][pos]) if name in bsk_columns else ""
 
     training_recommendations = []
 
-    # Iterate through BSKs (small number - fast)
-    for _, bsk_row in bsks.iterrows():
-        bsk_id = int(bsk_row["bsk_id"])
-        cluster_id = int(bsk_row["cluster_id"])
-
-        # Get top services for this BSK's cluster
-        cluster_services = cluster_top_services.get(cluster_id, [])
-
-        if not cluster_services:
-            continue
+    for start, end in zip(run_starts, run_ends):
+        pos = positions[start]
+        bsk_id = bsk_ids[pos]
 
         recommended_services = []
+        for i in range(start, end):
+            recommended_services.append(
+                {
+                    "service_id": service_ids[i],
+                    "service_name": service_names[i],
+                    "service_type": service_types[i],
+                    "service_desc": service_descs[i],
+                    "current_provisions": provision_counts[i],
+                    "cluster_avg_provisions": round(cluster_avgs[i], 2),
+                    "gap": round(gaps[i], 2),
+                }
+            )
 
-        # Check each top service (small number - fast)
-        for service_id in cluster_services:
-            service_id = int(service_id)
-
-            # Get this BSK's provision count for this service
-            provision_count = bsk_service_dict.get((bsk_id, service_id), 0)
-
-            # Get cluster average
-            cluster_avg = cluster_service_avg_dict.get((cluster_id, service_id), 0)
-
-            # If provisions are below threshold, recommend training
-            if provision_count < min_provision_threshold:
-                gap = cluster_avg - provision_count
-
-                # Get service details
-                if service_id in services_lookup:
-                    service_info = services_lookup[service_id]
-
-                    recommended_services.append(
-                        {
-                            "service_id": int(service_id),
-                            "service_name": str(
-                                service_info.get("service_name", "Unknown")
-                            ),
-                            "service_type": str(
-                                service_info.get("service_type", "N/A")
-                            ),
-                            "service_desc": str(service_info.get("service_desc", ""))[
-                                :200
-                            ],
-                            "current_provisions": int(provision_count),
-                            "cluster_avg_provisions": round(float(cluster_avg), 2),
-                            "gap": round(float(gap), 2),
-                        }
-                    )
-
-        # Only add recommendation if there are services to train on
-        if recommended_services:
-            # Get DEO information for this BSK
-            bsk_deos = deos_by_bsk.get(bsk_id, [])
-
-            deo_details = []
-            for deo_row in bsk_deos:
-                deo_details.append(
-                    {
-                        "agent_id": str(deo_row.get("agent_id", "")),
-                        "user_name": str(deo_row.get("user_name", "")),
-                        "agent_code": str(deo_row.get("agent_code", "")),
-                        "agent_email": str(deo_row.get("agent_email", "")),
-                        "agent_phone": str(deo_row.get("agent_phone", "")),
-                        "bsk_post": str(deo_row.get("bsk_post", "")),
-                        "is_active": bool(deo_row.get("is_active", False)),
-                    }
-                )
-
-            # Create recommendation record
-            recommendation = {
-                "bsk_id": int(bsk_id),
-                "bsk_name": str(bsk_row.get("bsk_name", "")),
-                "bsk_code": str(bsk_row.get("bsk_code", "")),
-                "district_name": str(bsk_row.get("district_name", "")),
-                "block_municipalty_name": str(
-                    bsk_row.get("block_municipalty_name", "")
-                ),
-                "bsk_type": str(bsk_row.get("bsk_type", "")),
-                "cluster_id": int(cluster_id),
-                "bsk_lat": (
-                    float(bsk_row["bsk_lat"]) if pd.notna(bsk_row["bsk_lat"]) else None
-                ),
-                "bsk_long": (
-                    float(bsk_row["bsk_long"])
-                    if pd.notna(bsk_row["bsk_long"])
-                    else None
-                ),
-                "total_training_services": len(recommended_services),
-                "recommended_services": sorted(
-                    recommended_services, key=lambda x: x["gap"], reverse=True
-                ),
-                "deos": deo_details,
-                "priority_score": sum(s["gap"] for s in recommended_services),
-            }
-
-            training_recommendations.append(recommendation)
+        # Get DEO information for this BSK
+        deo_details = deos_by_bsk.get(bsk_id, [])
+
+        # Create recommendation record
+        recommendation = {
+            "bsk_id": bsk_id,
+            "bsk_name": bsk_field("bsk_name", pos),
+            "bsk_code": bsk_field("bsk_code", pos),
+            "district_name": bsk_field("district_name", pos),
+            "block_municipalty_name": bsk_field("block_municipalty_name", pos),
+            "bsk_type": bsk_field("bsk_type", pos),
+            "cluster_id": cluster_ids[pos],
+            "bsk_lat": float(bsk_lats[pos]) if pd.notna(bsk_lats[pos]) else None,
+            "bsk_long": float(bsk_longs[pos]) if pd.notna(bsk_longs[pos]) else None,
+            "total_training_services": len(recommended_services),
+            "recommended_services": sorted(
+                recommended_services, key=lambda x: x["gap"], reverse=True
+            ),
+            "deos": deo_details,
+            "priority_score": sum(s["gap"] for s in recommended_services),
+        }
+
+        training_recommendations.append(recommendation)
 
     # Sort by priority
     training_recommendations = sorted(
@@ -296,8 +381,10 @@ def export_training_recommendations_json(
         recommendations: List of recommendation dictionaries
         filepath: Output file path
     """
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(recommendations, f, indent=2, ensure_ascii=False)
+    # orjson writes the UTF-8 bytes directly, in the layout json.dump gave
+    # with indent=2 and ensure_ascii=False
+    with open(filepath, "wb") as f:
+        f.write(orjson.dumps(recommendations, option=orjson.OPT_INDENT_2))
 
     print(f"💾 Training recommendations exported to {filepath}")
 
@@ -319,6 +406,7 @@ if __name__ == "__main__":
     try:
         from app.models.database import SessionLocal
         from app.models import models
+        from sqlalchemy import func, select
 
         print("=" * 80)
         print("TRAINING RECOMMENDATION SYSTEM - LOCAL TEST")
@@ -327,34 +415,72 @@ if __name__ == "__main__":
         # Create database session
         db = SessionLocal()
 
+        def read_table(model, *columns):
+            # Only the columns the recommendation reads, straight from the
+            # cursor into Arrow-backed columns, without building an ORM
+            # object per row
+            table = model.__table__
+            return pd.read_sql_query(
+                select(*(table.c[name] for name in columns)),
+                db.connection(),
+                dtype_backend="pyarrow",
+            )
+
         try:
             # Fetch data from database
             print("\n[1/4] Fetching BSK data from database...")
-            bsks = db.query(models.BSKMaster).all()
-            bsks_df = pd.DataFrame([b.__dict__ for b in bsks])
-            if "_sa_instance_state" in bsks_df.columns:
-                bsks_df.drop("_sa_instance_state", axis=1, inplace=True)
+            bsks_df = read_table(
+                models.BSKMaster,
+                "bsk_id",
+                "bsk_name",
+                "bsk_code",
+                "bsk_type",
+                "district_name",
+                "block_municipalty_name",
+                "bsk_lat",
+                "bsk_long",
+            )
             print(f"      ✓ Loaded {len(bsks_df)} BSK records")
 
-            print("\n[2/4] Fetching Provisions data from database...")
-            provisions = db.query(models.Provision).all()
-            provisions_df = pd.DataFrame([p.__dict__ for p in provisions])
-            if "_sa_instance_state" in provisions_df.columns:
-                provisions_df.drop("_sa_instance_state", axis=1, inplace=True)
-            print(f"      ✓ Loaded {len(provisions_df)} provision records")
+            # Only the per-(BSK, service) counts leave the database, served
+            # from ix_ml_provision_bsk_service, instead of every provision
+            print("\n[2/4] Counting provisions per BSK and service in the database...")
+            prov = models.Provision.__table__.c
+            provision_counts = pd.read_sql_query(
+                select(
+                    prov.bsk_id,
+                    prov.service_id,
+                    func.count().label("provision_count"),
+                )
+                .where(prov.bsk_id.is_not(None), prov.service_id.is_not(None))
+                .group_by(prov.bsk_id, prov.service_id),
+                db.connection(),
+                dtype_backend="pyarrow",
+            )
+            print(f"      ✓ Loaded {len(provision_counts)} BSK-service counts")
 
             print("\n[3/4] Fetching DEO data from database...")
-            deos = db.query(models.DEOMaster).all()
-            deos_df = pd.DataFrame([d.__dict__ for d in deos])
-            if "_sa_instance_state" in deos_df.columns:
-                deos_df.drop("_sa_instance_state", axis=1, inplace=True)
+            deos_df = read_table(
+                models.DEOMaster,
+                "agent_id",
+                "user_name",
+                "agent_code",
+                "agent_email",
+                "agent_phone",
+                "bsk_id",
+                "bsk_post",
+                "is_active",
+            )
             print(f"      ✓ Loaded {len(deos_df)} DEO records")
 
             print("\n[4/4] Fetching Services data from database...")
-            services = db.query(models.ServiceMaster).all()
-            services_df = pd.DataFrame([s.__dict__ for s in services])
-            if "_sa_instance_state" in services_df.columns:
-                services_df.drop("_sa_instance_state", axis=1, inplace=True)
+            services_df = read_table(
+                models.ServiceMaster,
+                "service_id",
+                "service_name",
+                "service_desc",
+                "service_type",
+            )
             print(f"      ✓ Loaded {len(services_df)} service records")
 
             print("\n" + "=" * 80)
@@ -365,11 +491,12 @@ if __name__ == "__main__":
             print("\n🔄 Generating training recommendations...")
             recommendations = training_recommendation(
                 bsks_df=bsks_df,
-                provisions_df=provisions_df,
+                provisions_df=None,
                 deos_df=deos_df,
                 services_df=services_df,
                 top_n_services=10,
                 min_provision_threshold=5,
+                precomputed_counts=provision_counts,
             )
 
             print("\n" + "=" * 80)
@@ -75,7 +75,10 @@ API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:54300")
 # Fetch data for overview
 def fetch_all_data(endpoint):
     try:
-        response = requests.get(f"{API_BASE_URL}/{endpoint}", timeout=5)
+        # all=true: the overview needs every record, not the first page
+        response = requests.get(
+            f"{API_BASE_URL}/{endpoint}", params={"all": "true"}, timeout=30
+        )
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import requests
+import json
 import sys
 import os
 import numpy as np
@@ -59,9 +60,9 @@ except ImportError as e:
             """Wrapper that uses API endpoints instead of direct database access"""
             try:
                 # Get data from the FastAPI backend
-                services = fetch_data("services/")
-                provisions = fetch_data("provisions/")
-                bsk_centers = fetch_data("bsk/")
+                services = fetch_data("services/", params={"all": "true"})
+                provisions = fetch_data("provisions/stream")
+                bsk_centers = fetch_data("bsk/", params={"all": "true"})
 
                 if not all([services, provisions, bsk_centers]):
                     st.error(
@@ -96,7 +97,7 @@ except ImportError as e:
                 )
 
                 # Get services data from API
-                services = fetch_data("services/")
+                services = fetch_data("services/", params={"all": "true"})
                 if not services:
                     st.info(
                         "📡 Cannot fetch services data from API for embedding initialization."
@@ -139,11 +140,15 @@ if "selected_bsk" not in st.session_state:
     st.session_state.selected_bsk = None
 
 
-def fetch_data(endpoint):
+def fetch_data(endpoint, params=None):
     """Fetch data from API with improved error handling"""
     try:
-        response = requests.get(f"{API_BASE_URL}/{endpoint}", timeout=5)
+        response = requests.get(f"{API_BASE_URL}/{endpoint}", params=params, timeout=30)
         response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith("application/x-ndjson"):
+            # Streamed endpoints send one JSON record per line
+            return [json.loads(line) for line in response.iter_lines() if line]
         return response.json()
     except requests.exceptions.ConnectionError:
         st.warning(f"🔌 Cannot connect to backend service at {API_BASE_URL}")
@@ -1,12 +1,17 @@
 import streamlit as st
 import asyncio
+import functools
+import hashlib
 import logging
 import os
-import tempfile
 import requests
+from requests.adapters import HTTPAdapter
 import shutil
-from typing import Optional, List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional, List, Dict
 from datetime import datetime
+from types import SimpleNamespace
 import sys
 
 # ==========================================
@@ -21,29 +26,49 @@ if project_root not in sys.path:
 
 try:
     from utils.service_utils import validate_service_content
-    from utils.audio_utils import text_to_speech
-    from utils.video_utils import create_slide, combine_slides_and_audio
-    from services.unsplash_service import fetch_and_save_photo
-    from services.gemini_service import generate_slides_from_raw
-    from utils.avatar_utils import add_avatar_to_slide
-    from utils.pdf_extractor import extract_raw_content
-    from utils.pdf_utils import generate_service_pdf
 
     IMPORTS_SUCCESSFUL = True
 except ImportError as e:
     IMPORTS_SUCCESSFUL = False
     IMPORT_ERROR = str(e)
 
-try:
-    from moviepy.config import change_settings
 
-    change_settings(
-        {
-            "IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
-        }
+@st.cache_resource
+def load_generation_modules() -> SimpleNamespace:
+    """
+    Import the video generation pipeline on first use
+    MoviePy, Gemini, Unsplash and the PDF tooling are slow to import and the
+    video library view never needs them
+    """
+    try:
+        from moviepy.config import change_settings
+
+        change_settings(
+            {
+                "IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
+            }
+        )
+    except:
+        pass
+
+    from utils.audio_utils import limited_text_to_speech
+    from utils.video_utils import create_slide, combine_slides_and_audio
+    from services.unsplash_service import fetch_and_save_photo
+    from services.gemini_service import stream_slides_from_raw
+    from utils.pdf_extractor import extract_raw_text
+    from utils.pdf_utils import generate_service_pdf, service_content_text
+
+    return SimpleNamespace(
+        limited_text_to_speech=limited_text_to_speech,
+        create_slide=create_slide,
+        combine_slides_and_audio=combine_slides_and_audio,
+        fetch_and_save_photo=fetch_and_save_photo,
+        stream_slides_from_raw=stream_slides_from_raw,
+        extract_raw_text=extract_raw_text,
+        generate_service_pdf=generate_service_pdf,
+        service_content_text=service_content_text,
     )
-except:
-    pass
+
 
 logging.basicConfig(level=logging.INFO)
 
@@ -116,9 +141,13 @@ st.markdown(
 )
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:54300")
+# Address the *browser* uses to reach the API, for video playback and downloads
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", API_BASE_URL)
 VIDEOS_BASE_DIR = os.path.join(project_root, "videos")
 # VIDEOS_BASE_DIR = "videos"
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # copy uploads to disk 1 MiB at a time
+
 VOICES = {
     "en-IN-NeerjaNeural": "Neerja (Female, Indian English)",
     "en-IN-PrabhatNeural": "Prabhat (Male, Indian English)",
@@ -128,22 +157,74 @@ VOICES = {
 # -------------------------------------------------
 # API HELPER FUNCTIONS (FIXED)
 # -------------------------------------------------
-@st.cache_data(ttl=300)
+API_TIMEOUT = (3, 10)  # (connect, read) seconds
+
+
+@st.cache_resource
+def get_api_session() -> requests.Session:
+    """Shared keep-alive session; the page script reruns, the pool must not"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_services() -> List[Dict]:
+    """
+    Fetch all services from the API, cached for five minutes
+    Raises on failure so an API outage is retried on the next rerun instead
+    of caching an empty list
+    """
+    response = get_api_session().get(
+        f"{API_BASE_URL}/services/", params={"all": "true"}, timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+
 def fetch_services_from_api() -> List[Dict]:
     """Fetch all services from the API"""
     try:
-        response = requests.get(f"{API_BASE_URL}/services/", timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return load_services()
     except Exception as e:
         st.error(f"Error fetching services: {e}")
         return []
 
 
+@st.cache_resource(ttl=300)
+def build_service_index() -> tuple:
+    """
+    Selectbox labels -> service_id, the ordered labels, and service_id -> name
+    Built once per services fetch and shared read-only across reruns, so a
+    rerun neither rebuilds nor copies them
+    """
+    services = load_services()
+    options = {
+        f"{s['service_name']} (ID: {s['service_id']})": s["service_id"]
+        for s in services
+    }
+    name_map = {s["service_id"]: s["service_name"] for s in services}
+    return options, list(options.keys()), name_map
+
+
+def get_service_index() -> tuple:
+    """Service index from build_service_index, empty while the API is down"""
+    try:
+        return build_service_index()
+    except Exception as e:
+        st.error(f"Error fetching services: {e}")
+        return {}, [], {}
+
+
+@st.cache_data(ttl=300)
 def get_service_by_id(service_id: int) -> Optional[Dict]:
     """Fetch a specific service by ID"""
     try:
-        response = requests.get(f"{API_BASE_URL}/services/{service_id}", timeout=10)
+        response = get_api_session().get(
+            f"{API_BASE_URL}/services/{service_id}", timeout=API_TIMEOUT
+        )
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -165,8 +246,8 @@ def create_video_record(
 
         logging.info(f"🔄 Sending to API: {payload}")
 
-        response = requests.post(
-            f"{API_BASE_URL}/service_videos/", json=payload, timeout=10
+        response = get_api_session().post(
+            f"{API_BASE_URL}/service_videos/", json=payload, timeout=API_TIMEOUT
         )
 
         logging.info(f"📡 Status Code: {response.status_code}")
@@ -184,47 +265,141 @@ def create_video_record(
         return False, str(e)
 
 
-def mark_videos_as_old(service_id: int, exclude_version: int = None) -> bool:
-    """Mark all videos except the specified version as old"""
-    try:
-        params = {"exclude_version": exclude_version} if exclude_version else {}
-        response = requests.patch(
-            f"{API_BASE_URL}/service_videos/{service_id}/mark_old",
-            params=params,
-            timeout=10,
-        )
-        response.raise_for_status()
-        return True
-    except Exception as e:
-        logging.warning(f"Error marking videos as old: {e}")
-        return False
+# -------------------------------------------------
+# FILE HELPERS
+# -------------------------------------------------
+# cache_resource rather than cache_data: cache_data hands every rerun a fresh
+# unpickled copy, which for a rendered video is hundreds of MB; bytes are
+# immutable, so sharing the one object is safe
+@st.cache_resource(max_entries=8)
+def read_file_bytes(path: str, mtime: float) -> bytes:
+    """Read a file once per modification time so reruns reuse the bytes"""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def file_download_data(path: str) -> Callable[[], bytes]:
+    """
+    Deferred data for a download button
+    Streamlit calls it only when the button is clicked, so listing many
+    videos reads none of them; the bytes are then cached until the file changes
+    """
+    return functools.partial(read_file_bytes, path, os.path.getmtime(path))
+
+
+def upload_digest(uploaded_file) -> str:
+    """SHA-256 of an uploaded file's content, read in chunks"""
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+@st.cache_data(persist="disk", max_entries=32, show_spinner=False)
+def extract_pdf_text(digest: str, _uploaded_pdf) -> str:
+    """
+    Extract the raw text of an uploaded PDF once per content hash
+    Only digest is part of the cache key, so re-uploading the same PDF skips
+    extraction (and OCR), even across app restarts
+    """
+    pipeline = load_generation_modules()
+    # The upload is already in memory, so PyMuPDF opens it from there
+    return pipeline.extract_raw_text(_uploaded_pdf.getvalue())
+
+
+def video_url(service_id: int, version: int, download: bool = False) -> str:
+    """
+    API URL serving a saved video with range support
+    The browser streams it from there, so listing videos never loads them into
+    the Streamlit process
+    """
+    url = f"{PUBLIC_API_URL}/videos/{service_id}/{version}"
+    return f"{url}?download=true" if download else url
 
 
 # -------------------------------------------------
 # VIDEO VERSION MANAGEMENT
 # -------------------------------------------------
-def get_next_version_number(service_id: int) -> int:
-    """Get the next version number for a service"""
+@st.cache_data(ttl=60)
+def scan_service_videos(service_dir: str, dir_mtime: float) -> List[Dict]:
+    """
+    List the versioned videos in a service directory in one scandir pass
+    dir_mtime is only part of the cache key, so adding or removing a video
+    invalidates the cached listing
+    """
+    videos = []
+    with os.scandir(service_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".mp4"):
+                continue
+            try:
+                version = int(entry.name.split("_v")[-1].replace(".mp4", ""))
+            except (ValueError, IndexError):
+                continue
+
+            stat = entry.stat()
+            videos.append(
+                {
+                    "filename": entry.name,
+                    "path": entry.path,
+                    "version": version,
+                    "size_mb": stat.st_size / (1024 * 1024),
+                    "created": datetime.fromtimestamp(stat.st_ctime),
+                }
+            )
+
+    return sorted(videos, key=lambda video: video["filename"], reverse=True)
+
+
+def get_service_video_list(service_id: int) -> List[Dict]:
+    """Get list of all video versions for a service"""
     service_dir = os.path.join(VIDEOS_BASE_DIR, str(service_id))
 
-    if not os.path.exists(service_dir):
-        return 1
+    try:
+        dir_mtime = os.path.getmtime(service_dir)
+    except OSError:
+        return []
+
+    return scan_service_videos(service_dir, dir_mtime)
 
-    video_files = [f for f in os.listdir(service_dir) if f.endswith(".mp4")]
-    versions = []
 
-    for video_file in video_files:
-        try:
-            version_part = video_file.split("_v")[-1].replace(".mp4", "")
-            versions.append(int(version_part))
-        except ValueError:
-            continue
+VERSION_FILE = ".version"  # last used version number, per service directory
+
+
+def read_latest_version(service_dir: str) -> Optional[int]:
+    """Last used version from the service's sidecar file, None if unavailable"""
+    try:
+        with open(os.path.join(service_dir, VERSION_FILE)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def write_latest_version(service_dir: str, version: int):
+    """Record the last used version, replacing the sidecar file atomically"""
+    version_path = os.path.join(service_dir, VERSION_FILE)
+    tmp_path = f"{version_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, version_path)
+
 
+def get_next_version_number(service_id: int) -> int:
+    """Get the next version number for a service"""
+    service_dir = os.path.join(VIDEOS_BASE_DIR, str(service_id))
+    latest = read_latest_version(service_dir)
+    if latest is not None:
+        return latest + 1
+
+    # No sidecar yet (first save, or a directory created by hand): scan
+    versions = [video["version"] for video in get_service_video_list(service_id)]
     return max(versions) + 1 if versions else 1
 
 
 def save_video_with_version(
-    video_source: str,
+    video_source,
     service_id: int,
     service_name: str,
     source_type: str,
@@ -232,6 +407,7 @@ def save_video_with_version(
 ) -> tuple:
     """
     Save video with proper versioning
+    video_source is a file path, or a readable file object when is_upload is set
     Returns: (video_path, version, db_success, db_message)
     """
     service_dir = os.path.join(VIDEOS_BASE_DIR, str(service_id))
@@ -239,64 +415,112 @@ def save_video_with_version(
 
     version = get_next_version_number(service_id)
     safe_service_name = service_name.replace(" ", "_").replace("/", "-")
-    filename = f"{safe_service_name}_v{version}.mp4"
-    video_path = os.path.join(service_dir, filename)
+    video_path = os.path.join(service_dir, f"{safe_service_name}_v{version}.mp4")
+    # A stale sidecar (videos copied in by hand) must never overwrite a file
+    while os.path.exists(video_path):
+        version += 1
+        video_path = os.path.join(service_dir, f"{safe_service_name}_v{version}.mp4")
 
-    # Save video file
+    # Save video file, streaming uploads straight into the versioned path
     if is_upload:
-        shutil.copy2(video_source, video_path)
+        video_source.seek(0)
+        with open(video_path, "wb") as f:
+            shutil.copyfileobj(video_source, f, length=UPLOAD_CHUNK_SIZE)
     else:
         shutil.move(video_source, video_path)
+    write_latest_version(service_dir, version)
 
     logging.info(f"Video saved to: {video_path}")
 
-    # Create database record
+    # The backend keeps one video row per service and the POST upserts it with
+    # the new version and is_new=True in a single transaction, so there is no
+    # separate round trip to mark earlier versions old
     db_success, db_message = create_video_record(
         service_id, service_name, version, source_type
     )
 
-    # Mark old videos (only if DB record was successful)
-    if db_success:
-        mark_videos_as_old(service_id, exclude_version=version)
-
     return video_path, version, db_success, db_message
 
 
-def get_service_video_list(service_id: int) -> List[Dict]:
-    """Get list of all video versions for a service"""
-    service_dir = os.path.join(VIDEOS_BASE_DIR, str(service_id))
+# -------------------------------------------------
+# VIDEO GENERATION LOGIC
+# -------------------------------------------------
+DEFAULT_SLIDE_IMAGE = os.path.join("assets", "default_background.jpg")
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
 
-    if not os.path.exists(service_dir):
-        return []
 
-    videos = []
-    video_files = sorted(
-        [f for f in os.listdir(service_dir) if f.endswith(".mp4")], reverse=True
+@st.cache_resource
+def get_render_pool() -> ThreadPoolExecutor:
+    """
+    Process-wide pool for final video encodes, shared by every session, so
+    concurrent users queue for a bounded number of renders instead of all
+    encoding at once
+    """
+    return ThreadPoolExecutor(
+        max_workers=RENDER_WORKERS, thread_name_prefix="video-render"
     )
 
-    for video_file in video_files:
+
+async def build_slide_clips(
+    pipeline: SimpleNamespace,
+    raw_text: str,
+    voice: str,
+    executor: ThreadPoolExecutor,
+    on_slide_done,
+) -> tuple:
+    """
+    Stream slides from the AI and render each one as soon as it arrives
+    Every slide's narration and image are fetched together, and its clip is
+    built on the executor as soon as both are ready, so slides overlap
+    instead of waiting on each other. Returns (slides, audio_paths, clips)
+    in slide order.
+    """
+    loop = asyncio.get_running_loop()
+    synthesize = pipeline.limited_text_to_speech(voice=voice)
+    slides: List[Dict] = []
+    tasks = []
+    image_tasks: Dict[str, asyncio.Task] = {}
+
+    async def fetch_image(keyword: str) -> str:
         try:
-            version = int(video_file.split("_v")[-1].replace(".mp4", ""))
-            video_path = os.path.join(service_dir, video_file)
+            return await asyncio.to_thread(pipeline.fetch_and_save_photo, keyword)
+        except Exception as e:
+            logging.warning(f"Image fetch failed for '{keyword}': {e}")
+            return DEFAULT_SLIDE_IMAGE
+
+    def image_for(keyword: str) -> asyncio.Task:
+        # Slides often share a keyword; they share one fetch as well
+        key = keyword.lower().strip()
+        if key not in image_tasks:
+            image_tasks[key] = asyncio.create_task(fetch_image(keyword))
+        return image_tasks[key]
+
+    async def render_slide(slide: Dict) -> tuple:
+        audio_path, image = await asyncio.gather(
+            synthesize(" ".join(slide["bullets"])),
+            image_for(slide["image_keyword"]),
+        )
+        clip = await loop.run_in_executor(
+            executor,
+            pipeline.create_slide,
+            slide["title"],
+            slide["bullets"],
+            image,
+            audio_path,
+        )
+        on_slide_done(len(tasks))
+        return audio_path, clip
 
-            videos.append(
-                {
-                    "filename": video_file,
-                    "path": video_path,
-                    "version": version,
-                    "size_mb": os.path.getsize(video_path) / (1024 * 1024),
-                    "created": datetime.fromtimestamp(os.path.getctime(video_path)),
-                }
-            )
-        except (ValueError, IndexError):
-            continue
+    async for slide in pipeline.stream_slides_from_raw(raw_text):
+        slides.append(slide)
+        tasks.append(asyncio.create_task(render_slide(slide)))
 
-    return videos
+    results = await asyncio.gather(*tasks)
+    audio_paths = [audio_path for audio_path, _ in results]
+    clips = [clip for _, clip in results]
+    return slides, audio_paths, clips
 
 
-# -------------------------------------------------
-# VIDEO GENERATION LOGIC
-# -------------------------------------------------
 def generate_video_from_content(
     selected_voice: str,
     service_id: int,
@@ -306,21 +530,22 @@ def generate_video_from_content(
     source_type: str,
 ):
     """Generate training video from either PDF or form content"""
+    try:
+        pipeline = load_generation_modules()
+    except Exception as e:  # ImportError, or a service rejecting its config
+        st.error(f"❌ Failed to import video generation modules: {e}")
+        return
+
     try:
         progress = st.progress(0)
         status = st.empty()
 
-        video_clips = []
-        audio_paths = []
+        pdf_future = None
 
         # Process PDF
         if uploaded_pdf:
             status.text("📄 Extracting content from PDF...")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(uploaded_pdf.read())
-                pdf_path = tmp.name
-            pages = extract_raw_content(pdf_path)
-            raw_text = "\n".join(line for page in pages for line in page["lines"])
+            raw_text = extract_pdf_text(upload_digest(uploaded_pdf), uploaded_pdf)
 
         # Process form content
         else:
@@ -329,48 +554,59 @@ def generate_video_from_content(
                 st.error(msg)
                 return
 
-            status.text("📄 Generating training PDF from form...")
-            pdf_path = generate_service_pdf(service_content)
-
-            with open(pdf_path, "rb") as f:
-                st.download_button(
-                    "📥 Download Training PDF",
-                    data=f.read(),
-                    file_name=os.path.basename(pdf_path),
-                    mime="application/pdf",
+            # The form content is already text, so feed it to the AI directly;
+            # the PDF is only for download and renders alongside the AI call
+            raw_text = pipeline.service_content_text(service_content)
+            pdf_executor = ThreadPoolExecutor(max_workers=1)
+            pdf_future = pdf_executor.submit(
+                pipeline.generate_service_pdf, service_content
+            )
+            pdf_executor.shutdown(wait=False)
+
+        # Slides stream in from the AI and each one is narrated, illustrated
+        # and rendered as soon as it arrives. Slide setup is mostly ImageMagick
+        # text rendering in subprocesses and NumPy blending, both of which
+        # release the GIL, so clips are built on a thread pool
+        status.text("🧠 Structuring training slides and generating narration...")
+        slides_done = 0
+
+        def on_slide_done(slides_started: int):
+            nonlocal slides_done
+            slides_done += 1
+            status.text(f"🎬 Created slide {slides_done}/{slides_started}")
+            progress.progress(min(80, int(slides_done / slides_started * 80)))
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            slides, audio_paths, video_clips = asyncio.run(
+                build_slide_clips(
+                    pipeline, raw_text, selected_voice, executor, on_slide_done
                 )
+            )
 
-            pages = extract_raw_content(pdf_path)
-            raw_text = "\n".join(line for page in pages for line in page["lines"])
-
-        # Generate slides using AI
-        status.text("🧠 Structuring training slides using AI...")
-        slides_response = generate_slides_from_raw(raw_text)
-        slides = slides_response["slides"]
-
-        # Create video slides
-        for i, slide in enumerate(slides):
-            status.text(f"🎬 Creating slide {i + 1}/{len(slides)}")
-
-            narration = " ".join(slide["bullets"])
-            audio = asyncio.run(text_to_speech(narration, voice=selected_voice))
-            audio_paths.append(audio)
-
-            try:
-                image = fetch_and_save_photo(slide["image_keyword"])
-            except Exception:
-                image = os.path.join("assets", "default_background.jpg")
-
-            clip = create_slide(slide["title"], slide["bullets"], image, audio)
-            clip = add_avatar_to_slide(clip, audio_duration=clip.duration)
-            video_clips.append(clip)
-            progress.progress(int((i + 1) / len(slides) * 80))
-
-        status.text("🎞️ Rendering final video...")
+        if pdf_future is not None:
+            pdf_path = pdf_future.result()
+            st.download_button(
+                "📥 Download Training PDF",
+                data=file_download_data(pdf_path),
+                file_name=os.path.basename(pdf_path),
+                mime="application/pdf",
+            )
 
-        temp_final_path = combine_slides_and_audio(
-            video_clips, audio_paths, service_name=f"{service_name}_temp"
+        render_future = get_render_pool().submit(
+            pipeline.combine_slides_and_audio,
+            video_clips,
+            audio_paths,
+            service_name=f"{service_name}_temp",
         )
+        render_start = time.monotonic()
+        while not wait([render_future], timeout=1).done:
+            if render_future.running():
+                elapsed = int(time.monotonic() - render_start)
+                status.text(f"🎞️ Rendering final video... ({elapsed}s)")
+            else:
+                status.text("⏳ Waiting for a free render slot...")
+                render_start = time.monotonic()
+        temp_final_path = render_future.result()
 
         video_path, version, db_success, db_message = save_video_with_version(
             video_source=temp_final_path,
@@ -453,11 +689,7 @@ if page_mode == "🔹 Create New Video":
         st.warning("⚠️ Unable to fetch services from API")
         st.stop()
 
-    service_options = {
-        f"{s['service_name']} (ID: {s['service_id']})": s["service_id"]
-        for s in services
-    }
-    service_names = list(service_options.keys())
+    service_options, service_names, _ = get_service_index()
 
     # Service Selection
     st.markdown("## 📋 Select Service")
@@ -552,15 +784,9 @@ if page_mode == "🔹 Create New Video":
             # Only process when button is clicked
             if upload_button:
                 with st.spinner("Uploading video..."):
-                    with tempfile.NamedTemporaryFile(
-                        delete=False, suffix=".mp4"
-                    ) as tmp:
-                        tmp.write(uploaded_video.read())
-                        temp_path = tmp.name
-
                     video_path, version, db_success, db_message = (
                         save_video_with_version(
-                            video_source=temp_path,
+                            video_source=uploaded_video,
                             service_id=selected_service_id,
                             service_name=service_details["service_name"],
                             source_type="uploaded",
@@ -568,8 +794,6 @@ if page_mode == "🔹 Create New Video":
                         )
                     )
 
-                    os.remove(temp_path)
-
                     # Show status
                     if db_success:
                         st.markdown(
@@ -598,13 +822,12 @@ if page_mode == "🔹 Create New Video":
 
                     st.video(video_path)
 
-                    with open(video_path, "rb") as f:
-                        st.download_button(
-                            "📥 Download Video",
-                            data=f.read(),
-                            file_name=os.path.basename(video_path),
-                            mime="video/mp4",
-                        )
+                    st.download_button(
+                        "📥 Download Video",
+                        data=file_download_data(video_path),
+                        file_name=os.path.basename(video_path),
+                        mime="video/mp4",
+                    )
 
                     if st.button("🔄 Upload Another", key="upload_another_btn"):
                         st.rerun()
@@ -711,12 +934,11 @@ if page_mode == "🔹 Create New Video":
             st.warning(f"⚠️ Video saved locally but database record failed")
             st.error(st.session_state.get("db_message", "Unknown error"))
 
-        with open(st.session_state["video_path"], "rb") as f:
-            st.video(f.read())
+        st.video(st.session_state["video_path"])
 
         st.download_button(
             "📥 Download Video",
-            data=open(st.session_state["video_path"], "rb").read(),
+            data=file_download_data(st.session_state["video_path"]),
             file_name=os.path.basename(st.session_state["video_path"]),
             mime="video/mp4",
         )
@@ -745,8 +967,7 @@ if page_mode == "🔹 Create New Video":
         st.subheader(
             f"👁️ Preview - Version {st.session_state.get('preview_video_version', 'N/A')}"
         )
-        with open(st.session_state["preview_video_path"], "rb") as f:
-            st.video(f.read())
+        st.video(st.session_state["preview_video_path"])
 
         if st.button("❌ Close Preview"):
             del st.session_state["preview_video_path"]
@@ -763,23 +984,24 @@ else:
         st.info("No videos found in library")
         st.stop()
 
-    service_dirs = [
-        d
-        for d in os.listdir(VIDEOS_BASE_DIR)
-        if os.path.isdir(os.path.join(VIDEOS_BASE_DIR, d))
-    ]
+    # Parsed once; stray non-numeric folders are not service libraries
+    with os.scandir(VIDEOS_BASE_DIR) as entries:
+        service_ids = sorted(
+            int(entry.name)
+            for entry in entries
+            if entry.name.isdigit() and entry.is_dir()
+        )
 
-    if not service_dirs:
+    if not service_ids:
         st.info("No videos available")
         st.stop()
 
-    services = fetch_services_from_api()
-    service_map = {s["service_id"]: s["service_name"] for s in services}
+    _, _, service_map = get_service_index()
 
-    st.subheader(f"🎬 Videos for {len(service_dirs)} services")
+    st.subheader(f"🎬 Videos for {len(service_ids)} services")
 
-    for service_id in sorted(service_dirs, key=lambda x: int(x)):
-        service_id_int = int(service_id)
+    for service_id_int in service_ids:
+        service_id = str(service_id_int)
         service_name = service_map.get(service_id_int, f"Service {service_id}")
 
         videos = get_service_video_list(service_id_int)
@@ -805,14 +1027,9 @@ else:
                     st.text(video["created"].strftime("%Y-%m-%d"))
 
                 with col4:
-                    with open(video["path"], "rb") as f:
-                        st.download_button(
-                            "📥",
-                            data=f.read(),
-                            file_name=video["filename"],
-                            mime="video/mp4",
-                            key=f"dl_{service_id}_{video['version']}",
-                        )
+                    st.link_button(
+                        "📥", video_url(service_id_int, video["version"], download=True)
+                    )
 
                 with col5:
                     if st.button("🗑️", key=f"del_{service_id}_{video['version']}"):
@@ -821,7 +1038,6 @@ else:
                         st.rerun()
 
                 with st.container():
-                    with open(video["path"], "rb") as f:
-                        st.video(f.read())
+                    st.video(video_url(service_id_int, video["version"]))
 
                 st.markdown("---")
@@ -136,7 +136,9 @@ VIDEOS_BASE_DIR = "videos"
 def fetch_all_services():
     """Fetch all services from API"""
     try:
-        response = requests.get(f"{API_BASE_URL}/services/", timeout=10)
+        response = requests.get(
+            f"{API_BASE_URL}/services/", params={"all": "true"}, timeout=10
+        )
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -152,44 +154,47 @@ def fetch_service_videos():
         # For now, we'll construct from file system
         videos = []
         if os.path.exists(VIDEOS_BASE_DIR):
-            for service_dir in os.listdir(VIDEOS_BASE_DIR):
-                service_path = os.path.join(VIDEOS_BASE_DIR, service_dir)
-                if os.path.isdir(service_path):
-                    service_id = int(service_dir)
-                    for video_file in os.listdir(service_path):
-                        if video_file.endswith(".mp4"):
-                            video_path = os.path.join(service_path, video_file)
-                            try:
-                                version = int(
-                                    video_file.split("_v")[-1].replace(".mp4", "")
-                                )
-                                created = datetime.fromtimestamp(
-                                    os.path.getctime(video_path)
-                                )
-                                size_mb = os.path.getsize(video_path) / (1024 * 1024)
-
-                                # Determine source type from filename or metadata
-                                if "pdf" in video_file.lower():
-                                    source = "pdf"
-                                elif "form" in video_file.lower():
-                                    source = "form"
-                                else:
-                                    source = "uploaded"
-
-                                videos.append(
-                                    {
-                                        "service_id": service_id,
-                                        "version": version,
-                                        "filename": video_file,
-                                        "size_mb": size_mb,
-                                        "created_at": created,
-                                        "source_type": source,
-                                        "is_new": (datetime.now() - created).days < 7,
-                                        "path": video_path,
-                                    }
-                                )
-                            except (ValueError, IndexError):
-                                continue
+            # scandir entries carry the file type, and one stat per video gives
+            # both size and ctime
+            with os.scandir(VIDEOS_BASE_DIR) as service_dirs:
+                service_entries = [d for d in service_dirs if d.is_dir()]
+            for service_entry in service_entries:
+                service_id = int(service_entry.name)
+                with os.scandir(service_entry.path) as video_entries:
+                    for video_entry in video_entries:
+                        video_file = video_entry.name
+                        if not video_file.endswith(".mp4"):
+                            continue
+                        try:
+                            version = int(
+                                video_file.split("_v")[-1].replace(".mp4", "")
+                            )
+                            stat = video_entry.stat()
+                            created = datetime.fromtimestamp(stat.st_ctime)
+                            size_mb = stat.st_size / (1024 * 1024)
+
+                            # Determine source type from filename or metadata
+                            if "pdf" in video_file.lower():
+                                source = "pdf"
+                            elif "form" in video_file.lower():
+                                source = "form"
+                            else:
+                                source = "uploaded"
+
+                            videos.append(
+                                {
+                                    "service_id": service_id,
+                                    "version": version,
+                                    "filename": video_file,
+                                    "size_mb": size_mb,
+                                    "created_at": created,
+                                    "source_type": source,
+                                    "is_new": (datetime.now() - created).days < 7,
+                                    "path": video_entry.path,
+                                }
+                            )
+                        except (ValueError, IndexError):
+                            continue
         return videos
     except Exception as e:
         st.error(f"Error scanning videos: {e}")
@@ -30,6 +30,66 @@ def extract_json(text: str):
     return json.loads(match.group())
 
 
+# -------------------------------------------------
+# INCREMENTAL JSON ARRAY PARSER
+# -------------------------------------------------
+class JsonArrayStreamParser:
+    """
+    Pull complete objects out of a JSON array while the text is still arriving
+
+    feed() takes the next piece of streamed text and returns every object of
+    the array under `key` that has been closed so far.
+    """
+
+    def __init__(self, key: str):
+        self.start_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.buffer = ""
+        self.pos = None  # scan position, set once the array has opened
+        self.depth = 0
+        self.object_start = None
+        self.in_string = False
+        self.escaped = False
+        self.done = False
+
+    def feed(self, text: str) -> list:
+        self.buffer += text
+        if self.done:
+            return []
+
+        if self.pos is None:
+            match = self.start_pattern.search(self.buffer)
+            if not match:
+                return []
+            self.pos = match.end()
+
+        objects = []
+        buffer = self.buffer
+        while self.pos < len(buffer):
+            ch = buffer[self.pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.object_start = self.pos
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    objects.append(json.loads(buffer[self.object_start : self.pos + 1]))
+            elif ch == "]" and self.depth == 0:
+                self.done = True
+                break
+            self.pos += 1
+        return objects
+
+
 # -------------------------------------------------
 # PROMPT (STRICT OUTPUT CONTROL)
 # -------------------------------------------------
@@ -104,11 +164,43 @@ def generate_slides_from_raw(raw_text: str):
     return data
 
 
+# -------------------------------------------------
+# STREAM SLIDES
+# -------------------------------------------------
+async def stream_slides_from_raw(raw_text: str):
+    """
+    Yield slides one by one while Gemini is still generating the rest,
+    so callers can start narration on early slides straight away
+    """
+    parser = JsonArrayStreamParser("slides")
+    count = 0
+
+    stream = await client.aio.models.generate_content_stream(
+        model=GEMINI_MODEL,
+        contents=build_prompt(raw_text),
+    )
+    async for chunk in stream:
+        for slide in parser.feed(chunk.text or ""):
+            count += 1
+            slide["slide_no"] = count
+            yield slide
+
+    # Output the incremental parser could not follow gets the same strict
+    # handling as generate_slides_from_raw
+    if count == 0:
+        data = extract_json(parser.buffer)
+        if "slides" not in data or not isinstance(data["slides"], list):
+            raise ValueError("Invalid slide output from Gemini")
+        for count, slide in enumerate(data["slides"], start=1):
+            slide["slide_no"] = count
+            yield slide
+
+
 # -------------------------------------------------
 # TEST
 # -------------------------------------------------
 if __name__ == "__main__":
-    from utils.pdf_extractor import extract_raw_content
+    from utils.pdf_extractor import extract_raw_content, join_pages
 
     PDF_PATH = input("Enter PDF path: ").strip()
 
@@ -116,6 +208,6 @@ if __name__ == "__main__":
         print("No PDF path provided, exiting.")
         exit(1)
 
-    RAW_CONTENT = extract_raw_content(PDF_PATH)
+    RAW_CONTENT = join_pages(extract_raw_content(PDF_PATH))
     slides = generate_slides_from_raw(RAW_CONTENT)
     print(json.dumps(slides, indent=2))
@@ -113,9 +113,9 @@ def generate_slides_from_raw(raw_text: str):
 # TEST
 # -------------------------------------------------
 if __name__ == "__main__":
-    from utils.pdf_extractor import extract_raw_content
+    from utils.pdf_extractor import extract_raw_content, join_pages
 
     PDF_PATH = r"C:\Users\techt\Downloads\ilovepdf_merged.pdf"
-    RAW_CONTENT = extract_raw_content(PDF_PATH)
+    RAW_CONTENT = join_pages(extract_raw_content(PDF_PATH))
     slides = generate_slides_from_raw(RAW_CONTENT)
     print(json.dumps(slides, indent=2))
@@ -10,6 +10,7 @@ Goals:
 import os
 import requests
 import hashlib
+import threading
 from urllib.parse import quote_plus
 from config import (
     UNSPLASH_ACCESS_KEY,
@@ -101,8 +102,12 @@ def fetch_and_save_photo(query: str) -> str:
         image_url = photo["urls"]["regular"]
 
         image_data = requests.get(image_url, timeout=10).content
-        with open(image_path, "wb") as f:
+        # Write under a unique name and rename, so another render reading the
+        # cache never sees a half-written image
+        temp_path = f"{image_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
             f.write(image_data)
+        os.replace(temp_path, image_path)
 
         return image_path
 
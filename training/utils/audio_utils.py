@@ -63,6 +63,10 @@ async def text_to_speech(
 
     narration_text = prepare_narration_text(text)
 
+    # Each Communicate opens its own aiohttp session and websocket and closes
+    # any connector handed to it, so connections can't be pooled across
+    # slides; callers instead run every slide on one event loop and bound the
+    # concurrent websockets (see limited_text_to_speech)
     communicate = edge_tts.Communicate(
         text=narration_text, voice=voice, rate=rate, pitch=pitch
     )
@@ -79,6 +83,31 @@ async def text_to_speech(
     return output_path
 
 
+# -------------------------------------------------
+# CONCURRENT TEXT TO SPEECH (ONE EVENT LOOP)
+# -------------------------------------------------
+MAX_TTS_CONNECTIONS = 4  # concurrent Edge-TTS websockets per generator
+
+
+def limited_text_to_speech(
+    voice: str = DEFAULT_VOICE,
+    rate: str = DEFAULT_RATE,
+    pitch: str = DEFAULT_PITCH,
+    max_connections: int = MAX_TTS_CONNECTIONS,
+):
+    """
+    Build a text_to_speech coroutine function that shares one connection
+    limit, for callers that start narration as each slide arrives.
+    """
+    semaphore = asyncio.Semaphore(max_connections)
+
+    async def synthesize(text):
+        async with semaphore:
+            return await text_to_speech(text, voice=voice, rate=rate, pitch=pitch)
+
+    return synthesize
+
+
 # -------------------------------------------------
 # SYNC HELPER (OPTIONAL BUT USEFUL)
 # -------------------------------------------------
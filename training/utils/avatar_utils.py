@@ -8,9 +8,12 @@ Design goals:
 - Easily replaceable with real lip-sync later
 """
 
+import functools
 import os
+import cv2
 from moviepy.editor import ImageClip, CompositeVideoClip
 import numpy as np
+from utils.frame_utils import blit
 
 # -------------------------------------------------
 # CONFIG
@@ -54,6 +57,59 @@ def create_avatar_clip(duration, position=("left", "bottom")):
     return avatar
 
 
+# -------------------------------------------------
+# DIRECT FRAME RENDERING
+# -------------------------------------------------
+@functools.lru_cache(maxsize=1)
+def load_avatar_image():
+    """Avatar as an RGBA uint8 array scaled to AVATAR_HEIGHT, or None"""
+    image = cv2.imread(DEFAULT_AVATAR_PATH, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None
+
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGBA)
+    elif image.shape[2] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGBA)
+    else:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+
+    h, w = image.shape[:2]
+    width = int(w * AVATAR_HEIGHT / h)
+    return cv2.resize(image, (width, AVATAR_HEIGHT), interpolation=cv2.INTER_AREA)
+
+
+@functools.lru_cache(maxsize=32)
+def avatar_layer(width, height):
+    """
+    Avatar resized to one breathing size, as float (rgb, alpha)
+    Breathing only spans a handful of integer sizes, so each is resized once
+    """
+    image = load_avatar_image()
+    base_h, base_w = image.shape[:2]
+    interpolation = cv2.INTER_LINEAR if width > base_w else cv2.INTER_AREA
+    resized = cv2.resize(image, (width, height), interpolation=interpolation)
+    resized = resized.astype(np.float32)
+    return resized[..., :3], resized[..., 3:] / 255.0
+
+
+def draw_avatar(frame, t):
+    """
+    Draw the avatar onto a frame in place, with the same breathing and sway
+    as create_avatar_clip, compositing only the avatar region
+    """
+    image = load_avatar_image()
+    if image is None:
+        return frame
+
+    scale = 1 + 0.015 * np.sin(2 * np.pi * t / 4)
+    h, w = image.shape[:2]
+    rgb, alpha = avatar_layer(int(w * scale), int(h * scale))
+
+    sway = 4 * np.sin(2 * np.pi * t / 6)
+    return blit(frame, rgb, alpha, int(60 + sway), 720 - AVATAR_HEIGHT - 40)
+
+
 # -------------------------------------------------
 # AVATAR OVERLAY HELPER
 # -------------------------------------------------
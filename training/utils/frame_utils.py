@@ -0,0 +1,48 @@
+"""
+Frame utilities for training video generation
+
+Goals:
+- Rasterize static layers once instead of per frame
+- Alpha-blend layers into a frame in place, touching only their region
+"""
+
+import numpy as np
+
+
+# -------------------------------------------------
+# LAYER RASTERIZATION
+# -------------------------------------------------
+def rasterize_clip(clip):
+    """
+    Render a static MoviePy clip (text, image) once
+
+    Returns:
+    - (rgb, alpha) float32 arrays, alpha shaped (h, w, 1) for broadcasting
+    """
+    rgb = clip.get_frame(0).astype(np.float32)
+    if clip.mask is not None:
+        alpha = clip.mask.get_frame(0).astype(np.float32)
+    else:
+        alpha = np.ones(rgb.shape[:2], dtype=np.float32)
+    return rgb, alpha[..., None]
+
+
+# -------------------------------------------------
+# ALPHA BLIT
+# -------------------------------------------------
+def blit(frame, rgb, alpha, x, y):
+    """
+    Alpha-blend an (rgb, alpha) layer onto frame at (x, y), in place.
+    Parts of the layer outside the frame are cropped.
+    """
+    h, w = rgb.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    src = rgb[y0 - y : y1 - y, x0 - x : x1 - x]
+    src_alpha = alpha[y0 - y : y1 - y, x0 - x : x1 - x]
+    region = frame[y0:y1, x0:x1].astype(np.float32)
+    frame[y0:y1, x0:x1] = region + src_alpha * (src - region)
+    return frame
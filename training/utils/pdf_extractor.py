@@ -8,6 +8,7 @@ import pytesseract
 from PIL import Image
 import re
 import shutil
+from collections import Counter
 from config import TESSERACT_CMD, OCR_AVAILABLE, OCR_DPI
 
 # -------------------------------------------------
@@ -48,38 +49,98 @@ def ocr_page(page):
 # -------------------------------------------------
 # RAW EXTRACTION (TEXT + OCR)
 # -------------------------------------------------
+def extract_page_lines(page):
+    """Extract cleaned text lines from one page, with OCR fallback"""
+    page_lines = []
+
+    # Normal text extraction
+    text = page.get_text("text")
+    for line in text.split("\n"):
+        line = clean_line(line)
+        if line:
+            page_lines.append(line)
+
+    # OCR fallback (ONLY if needed)
+    if OCR_AVAILABLE and (len(page_lines) < 10 or page.get_images()):
+        ocr_lines = ocr_page(page)
+
+        # Append OCR lines without deduping aggressively
+        for l in ocr_lines:
+            if l not in page_lines:
+                page_lines.append(l)
+
+    return page_lines
+
+
+def open_pdf(pdf_source):
+    """Open a PDF from a file path, or from its bytes without touching disk"""
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source)
+
+
 def extract_raw_content(pdf_path):
     """
-    Extract all text content from PDF
+    Extract all text content from PDF (a file path or the PDF bytes)
 
     Returns:
-        List of dictionaries with page numbers and lines
+        List of dictionaries with page numbers, lines and the page text
+        (lines joined with newlines)
     """
-    doc = fitz.open(pdf_path)
     pages = []
+    with open_pdf(pdf_path) as doc:
+        for page_no, page in enumerate(doc, start=1):
+            lines = extract_page_lines(page)
+            pages.append({"page": page_no, "lines": lines, "text": "\n".join(lines)})
+    return pages
 
-    for page_no, page in enumerate(doc, start=1):
-        page_lines = []
-
-        # Normal text extraction
-        text = page.get_text("text")
-        for line in text.split("\n"):
-            line = clean_line(line)
-            if line:
-                page_lines.append(line)
-
-        # OCR fallback (ONLY if needed)
-        if OCR_AVAILABLE and (len(page_lines) < 10 or page.get_images()):
-            ocr_lines = ocr_page(page)
 
-            # Append OCR lines without deduping aggressively
-            for l in ocr_lines:
-                if l not in page_lines:
-                    page_lines.append(l)
+def drop_repeated_lines(pages, min_pages=3):
+    """
+    Remove running headers and footers before the text goes to the AI
 
-        pages.append({"page": page_no, "lines": page_lines})
+    Lines found on at least half of the pages (and on min_pages or more) are
+    kept only where they first appear; everything else is untouched.
+    """
+    if len(pages) < min_pages:
+        return pages
+
+    counts = Counter(line for page in pages for line in set(page["lines"]))
+    threshold = max(min_pages, len(pages) / 2)
+    repeated = {line for line, count in counts.items() if count >= threshold}
+    if not repeated:
+        return pages
+
+    seen = set()
+    cleaned = []
+    for page in pages:
+        lines = []
+        for line in page["lines"]:
+            if line in repeated:
+                if line in seen:
+                    continue
+                seen.add(line)
+            lines.append(line)
+        cleaned.append({**page, "lines": lines, "text": "\n".join(lines)})
+    return cleaned
+
+
+def join_pages(pages):
+    """Join extracted pages into one string, skipping pages without text"""
+    return "\n".join(page["text"] for page in pages if page["text"])
+
+
+def extract_raw_text(pdf_path):
+    """
+    Extract all text content from PDF (a file path or the PDF bytes) as a
+    single string
 
-    return pages
+    Same lines as extract_raw_content, joined with newlines, for callers
+    that only need the raw text. Lines are joined per page and then the
+    pages joined, rather than one generator step per line. Running headers
+    and footers are kept once, to save prompt tokens.
+    """
+    return join_pages(drop_repeated_lines(extract_raw_content(pdf_path)))
 
 
 # -------------------------------------------------
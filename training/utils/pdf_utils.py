@@ -4,6 +4,34 @@ from reportlab.pdfgen import canvas
 import os
 from datetime import datetime
 
+PDF_HEADING = "BSK Training Service Document"
+
+
+def service_sections(service_content):
+    """(title, text) sections of the training document, in document order"""
+    return [
+        ("Service Name", service_content["service_name"]),
+        ("Service Description", service_content["service_description"]),
+        ("How to Apply", service_content["how_to_apply"]),
+        ("Eligibility Criteria", service_content["eligibility_criteria"]),
+        ("Required Documents", service_content["required_docs"]),
+        ("Operator Tips", service_content.get("operator_tips", "")),
+        ("Troubleshooting", service_content.get("troubleshooting", "")),
+        ("Fees & Timeline", service_content.get("fees_and_timeline", "")),
+    ]
+
+
+def service_content_text(service_content):
+    """
+    Plain text of the training document, as extracting its PDF would give,
+    built straight from the form content without rendering or parsing a PDF
+    """
+    lines = [PDF_HEADING]
+    for title, text in service_sections(service_content):
+        lines.append(title)
+        lines.extend(" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
 
 def generate_service_pdf(service_content, output_dir="generated_pdfs"):
     os.makedirs(output_dir, exist_ok=True)
@@ -19,7 +47,7 @@ def generate_service_pdf(service_content, output_dir="generated_pdfs"):
 
     y = height - 40
     c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, y, "BSK Training Service Document")
+    c.drawString(40, y, PDF_HEADING)
 
     c.setFont("Helvetica", 10)
     y -= 30
@@ -41,14 +69,8 @@ def generate_service_pdf(service_content, output_dir="generated_pdfs"):
             y -= 14
         y -= 10
 
-    write_section("Service Name", service_content["service_name"])
-    write_section("Service Description", service_content["service_description"])
-    write_section("How to Apply", service_content["how_to_apply"])
-    write_section("Eligibility Criteria", service_content["eligibility_criteria"])
-    write_section("Required Documents", service_content["required_docs"])
-    write_section("Operator Tips", service_content.get("operator_tips", ""))
-    write_section("Troubleshooting", service_content.get("troubleshooting", ""))
-    write_section("Fees & Timeline", service_content.get("fees_and_timeline", ""))
+    for title, text in service_sections(service_content):
+        write_section(title, text)
 
     c.save()
     return pdf_path
@@ -1,17 +1,18 @@
-from utils.avatar_utils import add_avatar_to_slide
+from utils.avatar_utils import draw_avatar
+from utils.frame_utils import blit, rasterize_clip
+import functools
+import logging
 import os
+import subprocess
 
+import numpy as np
 from moviepy.editor import (
     ImageClip,
-    concatenate_videoclips,
-    CompositeVideoClip,
-    AudioFileClip,
-    concatenate_audioclips,
+    VideoClip,
     TextClip,
-    ColorClip,
-    vfx,
 )
-from moviepy.config import change_settings
+from moviepy.config import change_settings, get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
 # -------------------------------------------------
 # ImageMagick config
@@ -24,151 +25,184 @@ VIDEO_W, VIDEO_H = 1280, 720
 TOP_TEXT_HEIGHT = int(VIDEO_H * 0.6)
 BOTTOM_IMAGE_HEIGHT = VIDEO_H - TOP_TEXT_HEIGHT
 
+# -------------------------------------------------
+# ENCODER SELECTION
+# -------------------------------------------------
+# (codec, preset, extra ffmpeg params), tried in order; libx264 always works
+HARDWARE_ENCODERS = [
+    (
+        "h264_nvenc",
+        "p5",
+        ["-tune", "hq", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    ),
+    ("h264_qsv", "veryfast", ["-global_quality", "23"]),
+    ("h264_videotoolbox", "medium", ["-b:v", "2000k"]),
+]
+SOFTWARE_ENCODER = ("libx264", "ultrafast", ["-crf", "23"])
+
+
+def encoder_works(codec):
+    """Check that ffmpeg can actually open an encoder on this machine"""
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        "color=size=256x256:duration=0.1",
+        "-c:v",
+        codec,
+        "-f",
+        "null",
+        "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=20)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def select_video_encoder():
+    """
+    Pick a hardware H.264 encoder (NVENC, Quick Sync, VideoToolbox) when one
+    is usable, falling back to libx264. Probed once per process.
+    """
+    for codec, preset, params in HARDWARE_ENCODERS:
+        if encoder_works(codec):
+            logging.info(f"Using hardware video encoder {codec}")
+            return codec, preset, params
+    return SOFTWARE_ENCODER
+
 
 # -------------------------------------------------
 # SLIDE CREATION WITH BETTER ANIMATION
 # -------------------------------------------------
+def text_layer(text, fontsize, color, font, width):
+    """Rasterize one caption TextClip as float (rgb, alpha)"""
+    clip = TextClip(
+        text,
+        fontsize=fontsize,
+        color=color,
+        font=font,
+        size=(width, None),
+        method="caption",
+    )
+    return rasterize_clip(clip)
+
+
+def centered_x(rgb):
+    """Left edge that horizontally centers a layer, as MoviePy's "center" does"""
+    return int((VIDEO_W - rgb.shape[1]) / 2)
+
+
 def create_slide(title, points, image_path, audio_file):
     if not os.path.exists(audio_file) or os.path.getsize(audio_file) < 1024:
         raise RuntimeError(f"Invalid audio file: {audio_file}")
-    audio_clip = AudioFileClip(audio_file)
-    duration = audio_clip.duration + 0.4  # small buffer
+    # Only the narration length is needed here: combine_slides_and_audio muxes
+    # the audio files itself, so there is no point opening a decoder per slide
+    audio_duration = ffmpeg_parse_infos(audio_file)["duration"]
+    duration = audio_duration + 0.4  # small buffer
+    avatar_duration = audio_duration
+
+    # Every layer is rasterized once and blended straight into the frame,
+    # instead of MoviePy re-compositing a stack of clips for every frame.
+    # Layers are (rgb, alpha, x, y, start, fadein, opacity); fadein ramps the
+    # layer's colour up from black like MoviePy's fadein.
+    layers = []
 
     # -----------------------------
     # BACKGROUND (soft animated)
     # -----------------------------
-    bg = (
-        ColorClip(size=(VIDEO_W, VIDEO_H), color=(20, 22, 32))
-        .set_duration(duration)
-        .fx(vfx.fadein, 0.4)
-        .fx(vfx.fadeout, 0.4)
-    )
-
-    overlay = (
-        ColorClip(size=(VIDEO_W, VIDEO_H), color=(0, 0, 0))
-        .set_opacity(0.35)
-        .set_duration(duration)
-    )
+    # Background colour under a 35% black overlay
+    bg_color = np.array([20, 22, 32], dtype=np.float32) * (1 - 0.35)
+    bg_fade = 0.4
 
     # -----------------------------
     # TITLE
     # -----------------------------
-    title_clip = (
-        TextClip(
-            title,
-            fontsize=48,
-            color="white",
-            font="Arial-Bold",
-            size=(VIDEO_W - 120, None),
-            method="caption",
-        )
-        .set_position(("center", 50))
-        .set_start(0.2)
-        .set_duration(duration)
-        .fadein(0.6)
-    )
-
-    title_shadow = (
-        TextClip(
-            title,
-            fontsize=48,
-            color="black",
-            font="Arial-Bold",
-            size=(VIDEO_W - 120, None),
-            method="caption",
-        )
-        .set_position(("center", 52))
-        .set_start(0.2)
-        .set_duration(duration)
-        .set_opacity(0.6)
+    title_rgb, title_alpha = text_layer(title, 48, "white", "Arial-Bold", VIDEO_W - 120)
+    shadow_rgb, shadow_alpha = text_layer(
+        title, 48, "black", "Arial-Bold", VIDEO_W - 120
     )
+    layers.append((shadow_rgb, shadow_alpha, centered_x(shadow_rgb), 52, 0.2, 0, 0.6))
+    layers.append((title_rgb, title_alpha, centered_x(title_rgb), 50, 0.2, 0.6, 1.0))
 
     # -----------------------------
     # BULLETS (top section only)
     # -----------------------------
-    bullet_clips = []
     start_y = 140
     line_gap = 44
 
     for i, point in enumerate(points[:5]):
         appear_time = 0.8 + i * 0.5
         text = f"• {point.strip()}"
+        y = start_y + i * line_gap
 
-        bullet = (
-            TextClip(
-                text,
-                fontsize=32,
-                color="white",
-                font="Arial",
-                size=(VIDEO_W - 200, None),
-                method="caption",
-            )
-            .set_position((100, start_y + i * line_gap))
-            .set_start(appear_time)
-            .set_duration(duration - appear_time)
-            .fadein(0.4)
-        )
-
-        shadow = (
-            TextClip(
-                text,
-                fontsize=32,
-                color="black",
-                font="Arial",
-                size=(VIDEO_W - 200, None),
-                method="caption",
-            )
-            .set_position((102, start_y + i * line_gap + 2))
-            .set_start(appear_time)
-            .set_duration(duration - appear_time)
-            .set_opacity(0.5)
-        )
-
-        bullet_clips.extend([shadow, bullet])
+        shadow_rgb, shadow_alpha = text_layer(text, 32, "black", "Arial", VIDEO_W - 200)
+        bullet_rgb, bullet_alpha = text_layer(text, 32, "white", "Arial", VIDEO_W - 200)
+        layers.append((shadow_rgb, shadow_alpha, 102, y + 2, appear_time, 0, 0.5))
+        layers.append((bullet_rgb, bullet_alpha, 100, y, appear_time, 0.4, 1.0))
 
     # -----------------------------
     # CONTENT IMAGE (BOTTOM-RIGHT, STATIC)
     # -----------------------------
-    image_clips = []
     if os.path.exists(image_path):
-        img = (
-            ImageClip(image_path)
-            .resize(height=220)  # fixed, clean size
-            .set_position(
-                (VIDEO_W - 260, VIDEO_H - 260)  # right margin  # bottom margin
-            )
-            .set_duration(duration)
-        )
-
-        image_clips.append(img)
+        img = ImageClip(image_path).resize(height=220)  # fixed, clean size
+        img_rgb, img_alpha = rasterize_clip(img)
+        # right margin, bottom margin
+        layers.append((img_rgb, img_alpha, VIDEO_W - 260, VIDEO_H - 260, 0, 0, 1.0))
 
     # -----------------------------
     # FOOTER
     # -----------------------------
-    footer = (
-        TextClip(
-            "Bangla Sahayta Kendra • Government of West Bengal",
-            fontsize=18,
-            color="lightgray",
-            font="Arial",
-            size=(VIDEO_W - 80, None),
-            method="caption",
-        )
-        .set_position(("center", VIDEO_H - 40))
-        .set_duration(duration)
+    footer_rgb, footer_alpha = text_layer(
+        "Bangla Sahayta Kendra • Government of West Bengal",
+        18,
+        "lightgray",
+        "Arial",
+        VIDEO_W - 80,
+    )
+    layers.append(
+        (footer_rgb, footer_alpha, centered_x(footer_rgb), VIDEO_H - 40, 0, 0, 1.0)
     )
 
-    slide = CompositeVideoClip(
-        [bg, overlay, title_shadow, title_clip] + bullet_clips + image_clips + [footer],
-        size=(VIDEO_W, VIDEO_H),
-    ).set_duration(duration)
+    def compose(t):
+        fade = min(1.0, t / bg_fade, (duration - t) / bg_fade)
+        frame = np.empty((VIDEO_H, VIDEO_W, 3), dtype=np.float32)
+        frame[:] = bg_color * max(fade, 0.0)
+        for rgb, alpha, x, y, start, fadein, opacity in layers:
+            if t < start:
+                continue
+            if fadein and t - start < fadein:
+                rgb = rgb * ((t - start) / fadein)
+            blit(frame, rgb, alpha * opacity if opacity < 1 else alpha, x, y)
+        return frame.astype(np.uint8)
 
-    slide = slide.set_audio(audio_clip)
+    # Once the background has faded in and every layer has fully appeared the
+    # slide is static until the background fades out, so render that frame once
+    settle_time = max(
+        [bg_fade] + [start + fadein for _, _, _, _, start, fadein, _ in layers]
+    )
+    settled_frame = compose(settle_time) if settle_time < duration - bg_fade else None
 
-    # -----------------------------
-    # AVATAR (kept intact)
-    # -----------------------------
-    slide = add_avatar_to_slide(slide, audio_clip.duration)
+    def make_frame(t):
+        if settled_frame is not None and settle_time <= t < duration - bg_fade:
+            frame = settled_frame.copy()
+        else:
+            frame = compose(t)
+
+        # -----------------------------
+        # AVATAR (kept intact)
+        # -----------------------------
+        if t < avatar_duration:
+            draw_avatar(frame, t)
+        return frame
+
+    slide = VideoClip(make_frame, duration=duration)
 
     return slide.crossfadein(0.4).crossfadeout(0.4)
 
@@ -176,15 +210,46 @@ def create_slide(title, points, image_path, audio_file):
 # -------------------------------------------------
 # COMBINE SLIDES (NO BLACK GAPS)
 # -------------------------------------------------
-def combine_slides_and_audio(video_clips, audio_paths, service_name=None):
-    # Smooth overlap between slides
-    final_video = concatenate_videoclips(video_clips, method="compose", padding=-0.4)
+SLIDE_OVERLAP = 0.4  # seconds each slide crossfades into the next
+OUTPUT_FPS = 24
+
 
-    audio_clips = [AudioFileClip(p) for p in audio_paths]
-    final_audio = concatenate_audioclips(audio_clips)
+def iter_slide_frames(video_clips, fps=OUTPUT_FPS, overlap=SLIDE_OVERLAP):
+    """
+    Yield the concatenated slide frames as uint8 RGB arrays
 
-    final_video = final_video.set_audio(final_audio)
+    Each slide starts `overlap` seconds before the previous one ends and is
+    blended over it with its crossfade mask, as concatenate_videoclips with
+    method="compose" and negative padding did.
+    """
+    durations = [clip.duration for clip in video_clips]
+    starts = np.cumsum([0] + durations[:-1]) - overlap * np.arange(len(durations))
+    total = sum(durations) - overlap * len(durations)
 
+    for i in range(int(total * fps)):
+        t = i / fps
+        frame = None
+        for clip, start, duration in zip(video_clips, starts, durations):
+            if not start <= t < start + duration:
+                continue
+            clip_frame = clip.get_frame(t - start)
+            mask = 1.0 if clip.mask is None else clip.mask.get_frame(t - start)
+            if np.all(mask >= 1.0):
+                # Outside the crossfades a slide frame goes out as is; only
+                # the overlaps need float blending
+                frame = clip_frame
+                continue
+            if np.ndim(mask) == 2:
+                mask = mask[..., None]
+            below = 0.0 if frame is None else frame
+            frame = mask * clip_frame + (1.0 - mask) * below
+
+        if frame is None:
+            frame = np.zeros((VIDEO_H, VIDEO_W, 3), dtype=np.uint8)
+        yield frame.astype(np.uint8, copy=False)
+
+
+def combine_slides_and_audio(video_clips, audio_paths, service_name=None):
     os.makedirs("output_videos", exist_ok=True)
 
     filename = "bsk_training_video.mp4"
@@ -194,14 +259,66 @@ def combine_slides_and_audio(video_clips, audio_paths, service_name=None):
 
     output_path = os.path.join("output_videos", filename)
 
-    final_video.write_videofile(
+    # Frames go straight into a single ffmpeg process over stdin, and ffmpeg
+    # concatenates the narration files itself, so there is no MoviePy
+    # composite clip and no temporary audio file
+    codec, preset, encoder_params = select_video_encoder()
+    audio_inputs = []
+    for path in audio_paths:
+        audio_inputs += ["-i", path]
+    audio_labels = "".join(f"[{i + 1}:a]" for i in range(len(audio_paths)))
+
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-s",
+        f"{VIDEO_W}x{VIDEO_H}",
+        "-r",
+        str(OUTPUT_FPS),
+        "-i",
+        "pipe:0",
+        *audio_inputs,
+        "-filter_complex",
+        f"{audio_labels}concat=n={len(audio_paths)}:v=0:a=1[audio]",
+        "-map",
+        "0:v",
+        "-map",
+        "[audio]",
+        "-c:v",
+        codec,
+        "-preset",
+        preset,
+        *encoder_params,
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "aac",
+        # Slides are mostly static; faststart lets the browser play before
+        # the download ends
+        "-movflags",
+        "+faststart",
         output_path,
-        codec="libx264",
-        audio_codec="aac",
-        fps=30,
-        preset="medium",
-        bitrate="2000k",
-        threads=4,
-    )
+    ]
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for frame in iter_slide_frames(video_clips):
+            proc.stdin.write(frame.tobytes())
+    except BrokenPipeError:
+        pass
+    finally:
+        proc.stdin.close()
+        stderr = proc.stderr.read()
+        proc.wait()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace')}")
 
     return output_path